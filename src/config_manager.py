@@ -1,41 +1,108 @@
 import json
 import os
+import atexit
 import logging
+import queue
+import threading
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from typing import Dict, Any, Optional, Union
 from pathlib import Path
 
-# 自动加载环境变量
-try:
-    from dotenv import load_dotenv
-    load_dotenv(override=True)
-except ImportError:
-    # 如果没有安装 python-dotenv，跳过
-    pass
+# 标记 .env 已加载的环境变量，子进程继承后无需重复查找和解析 .env
+DOTENV_LOADED_FLAG = "_REPORTWRITER_DOTENV_LOADED"
+
+def _load_env() -> None:
+    """加载 .env 环境变量（每个进程树只加载一次，已存在的环境变量优先）"""
+    if os.environ.get(DOTENV_LOADED_FLAG):
+        return
+    
+    try:
+        from dotenv import load_dotenv
+        load_dotenv()
+    except ImportError:
+        # 如果没有安装 python-dotenv，跳过
+        pass
+    
+    os.environ[DOTENV_LOADED_FLAG] = "1"
+
+logger = logging.getLogger(__name__)
+
+# 日志文件轮转默认值（可通过 logging.max_bytes / logging.backup_count 覆盖）
+DEFAULT_LOG_MAX_BYTES = 10 * 1024 * 1024
+DEFAULT_LOG_BACKUP_COUNT = 5
+
+# 后台写日志文件的监听线程，写文件的 I/O 不阻塞业务线程
+_log_listener: Optional[QueueListener] = None
+
+def _stop_log_listener() -> None:
+    """停止日志监听线程，确保队列中的日志全部写入文件"""
+    global _log_listener
+    if _log_listener is not None:
+        _log_listener.stop()
+        for handler in _log_listener.handlers:
+            handler.close()
+        _log_listener = None
+
+atexit.register(_stop_log_listener)
 
 class ConfigurationError(Exception):
     """配置相关的异常"""
     pass
 
+def strip_inline_comment(value: str) -> str:
+    """去除配置值中的行内注释（# 及其后内容）和首尾空白"""
+    return value.partition('#')[0].strip()
+
+def _strip_gitlab_inline_comments(gitlab_config: Dict[str, Any]) -> None:
+    """去除 GitLab 令牌和项目ID（包括多项目配置中的 id）的行内注释"""
+    for key in ("token", "project_id"):
+        if isinstance(gitlab_config.get(key), str):
+            gitlab_config[key] = strip_inline_comment(gitlab_config[key])
+    
+    projects = gitlab_config.get("projects")
+    if isinstance(projects, list):
+        for project in projects:
+            if isinstance(project, dict) and isinstance(project.get("id"), str):
+                project["id"] = strip_inline_comment(project["id"])
+
 class ConfigManager:
-    """配置管理器，负责加载和管理所有配置"""
+    """配置管理器，负责加载和管理所有配置
+
+    self.config 视为只读：需要修改配置时请通过 save_config() 写回文件后 reload_config()
+    """
     
     def __init__(self, config_path: str = "config.json"):
+        # 环境变量只通过 ConfigManager 读取，创建实例时再加载 .env，
+        # 这样 -V/-h 等不需要配置的路径不必导入 python-dotenv 和解析 .env
+        _load_env()
         self.config_path = Path(config_path)
         self.config = self._load_config()
+        self._flat = self._flatten_config(self.config)
         self._validate_config()
+        self.console_handler: Optional[logging.StreamHandler] = None
+        self._cli_overrides: Dict[str, str] = {}
         self._setup_logging()
     
     def _load_config(self) -> Dict[str, Any]:
-        """加载配置文件"""
+        """加载配置文件
+
+        不做解析缓存：全局配置实例只加载一次，只有 reload_config() 才会再次读取；
+        config.json 很小，直接解析比 stat 校验加深拷贝缓存结果还快。
+        """
         try:
-            if not self.config_path.exists():
-                logging.warning(f"配置文件 {self.config_path} 不存在，使用默认配置")
+            try:
+                with open(self.config_path, 'r', encoding='utf-8') as f:
+                    config_data = json.load(f)
+            except FileNotFoundError:
+                logger.warning("配置文件 %s 不存在，使用默认配置", self.config_path)
                 return self._get_default_config()
             
-            with open(self.config_path, 'r', encoding='utf-8') as f:
-                config_data = json.load(f)
-                logging.info(f"成功加载配置文件: {self.config_path}")
-                return config_data
+            # 令牌和项目ID 在加载时去除行内注释；分支名（如 feature#12）、URL、提示词等可能合法地包含 #，保持原样
+            if isinstance(config_data.get("gitlab"), dict):
+                _strip_gitlab_inline_comments(config_data["gitlab"])
+            
+            logger.info("成功加载配置文件: %s", self.config_path)
+            return config_data
                 
         except json.JSONDecodeError as e:
             raise ConfigurationError(f"配置文件格式错误: {e}")
@@ -109,7 +176,7 @@ class ConfigManager:
                 raise ConfigurationError("max_backups 必须是正整数")
 
             # 验证多项目配置
-            projects = self.config.get("gitlab.projects", [])
+            projects = self.get("gitlab.projects", [])
             if not isinstance(projects, list):
                 raise ConfigurationError("gitlab.projects 必须是一个列表")
             
@@ -139,39 +206,79 @@ class ConfigManager:
         root_logger = logging.getLogger()
         for handler in root_logger.handlers[:]:
             root_logger.removeHandler(handler)
+        _stop_log_listener()
+        
+        # 文件日志按大小轮转，并通过队列交给后台线程写入
+        file_handler = RotatingFileHandler(
+            log_file,
+            maxBytes=log_config.get("max_bytes", DEFAULT_LOG_MAX_BYTES),
+            backupCount=log_config.get("backup_count", DEFAULT_LOG_BACKUP_COUNT),
+            encoding='utf-8'
+        )
+        file_handler.setFormatter(logging.Formatter(log_format))
+        
+        log_queue: queue.Queue = queue.Queue(-1)
+        queue_handler = QueueHandler(log_queue)
+        # 入队时只渲染消息本身，完整格式由文件处理器负责，避免重复格式化
+        queue_handler.setFormatter(logging.Formatter("%(message)s"))
+        
+        global _log_listener
+        _log_listener = QueueListener(log_queue, file_handler)
+        _log_listener.start()
+        
+        # 保留控制台处理器的引用，命令行调整输出格式时无需再遍历根日志器的处理器
+        self.console_handler = logging.StreamHandler()
         
         # 设置新的日志配置
         logging.basicConfig(
             level=getattr(logging, log_level.upper(), logging.INFO),
             format=log_format,
             handlers=[
-                logging.FileHandler(log_file, encoding='utf-8'),
-                logging.StreamHandler()
+                queue_handler,
+                self.console_handler
             ]
         )
     
+    @staticmethod
+    def _flatten_config(config_data: Dict[str, Any]) -> Dict[str, Any]:
+        """将嵌套配置展开为点号分隔键的扁平字典（中间层级的字典同样保留）"""
+        flat: Dict[str, Any] = {}
+        
+        def walk(node: Dict[str, Any], prefix: str) -> None:
+            for key, value in node.items():
+                full_key = f"{prefix}{key}"
+                flat[full_key] = value
+                if isinstance(value, dict):
+                    walk(value, f"{full_key}.")
+        
+        walk(config_data, "")
+        return flat
+    
     def get(self, key: str, default: Any = None) -> Any:
         """获取配置值，支持点号分隔的嵌套键"""
         if not key:
             return default
         
-        try:
-            keys = key.split('.')
-            value = self.config
-            
-            for k in keys:
-                if not isinstance(value, dict) or k not in value:
-                    return default
-                value = value[k]
-            
-            return value if value is not None else default
-            
-        except Exception:
-            return default
+        # 加载时已展开为扁平字典，查找为一次字典访问
+        value = self._flat.get(key)
+        return value if value is not None else default
+    
+    def set_cli_overrides(self, overrides: Dict[str, str]) -> None:
+        """设置命令行参数对环境变量的覆盖值
+
+        只在本进程内生效，不写入 os.environ（没有子进程需要读取这些值，
+        也避免把令牌等敏感信息留在进程环境中）。命令行传入的值按原样使用，不做行内注释处理。
+        """
+        self._cli_overrides = dict(overrides)
     
     def get_env_or_config(self, env_key: str, config_key: Optional[str] = None, default: Any = None) -> Any:
-        """优先从环境变量获取，否则从配置文件获取"""
-        # 优先从环境变量获取
+        """优先使用命令行覆盖值，其次从环境变量获取，否则从配置文件获取"""
+        cli_value = self._cli_overrides.get(env_key)
+        if cli_value is not None:
+            return cli_value
+        
+        # 其次从环境变量获取
+        # .env 中的行内注释已由 python-dotenv 去除，值按原样使用
         env_value = os.getenv(env_key)
         if env_value is not None:
             return env_value
@@ -193,10 +300,11 @@ class ConfigManager:
         """重新加载配置文件"""
         try:
             self.config = self._load_config()
+            self._flat = self._flatten_config(self.config)
             self._validate_config()
-            logging.info("配置文件重新加载成功")
+            logger.info("配置文件重新加载成功")
         except Exception as e:
-            logging.error(f"重新加载配置文件失败: {e}")
+            logger.error("重新加载配置文件失败: %s", e)
             raise
     
     def save_config(self, config_data: Dict[str, Any]) -> None:
@@ -204,9 +312,25 @@ class ConfigManager:
         try:
             with open(self.config_path, 'w', encoding='utf-8') as f:
                 json.dump(config_data, f, ensure_ascii=False, indent=4)
-            logging.info(f"配置已保存到: {self.config_path}")
+            logger.info("配置已保存到: %s", self.config_path)
         except Exception as e:
             raise ConfigurationError(f"保存配置文件失败: {e}")
 
-# 全局配置实例
-config = ConfigManager() 
\ No newline at end of file
+# 全局配置实例，首次访问时才创建，避免导入模块即触发文件读取与日志初始化
+_config: Optional[ConfigManager] = None
+_CONFIG_INSTANCE_LOCK = threading.Lock()
+
+def get_config() -> ConfigManager:
+    """获取全局配置实例（首次调用时加载配置）"""
+    global _config
+    if _config is None:
+        with _CONFIG_INSTANCE_LOCK:
+            if _config is None:
+                _config = ConfigManager()
+    return _config
+
+def __getattr__(name: str) -> Any:
+    """兼容 `config_manager.config` 的访问方式，按需创建全局配置实例"""
+    if name == "config":
+        return get_config()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -4,12 +4,26 @@
 提供日期计算、格式化、解析等工具函数
 """
 
-from datetime import datetime, timedelta
-from typing import List, Optional, Union
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from typing import Optional, Tuple, Union
 import logging
+import re
 
 logger = logging.getLogger(__name__)
 
+# 常见日期形态：2025/10/31、2025-10-31、2025/1/5（分隔符需前后一致）
+_DATE_RE = re.compile(r'^(\d{4})([/-])(\d{1,2})\2(\d{1,2})$')
+
+# 中文星期名称，下标与 datetime.weekday() 对应
+_WEEKDAY_CN = ("周一", "周二", "周三", "周四", "周五", "周六", "周日")
+
+# 正则未命中时的兜底格式
+_FALLBACK_DATE_FORMATS = (
+    "%Y/%m/%d",      # 2025/10/31
+    "%Y-%m-%d",      # 2025-10-31
+)
+
 
 def get_week_start(date_obj: Optional[datetime] = None) -> datetime:
     """
@@ -34,23 +48,27 @@ def get_week_start(date_obj: Optional[datetime] = None) -> datetime:
     return monday
 
 
-def get_week_dates(week_start: Optional[datetime] = None) -> List[datetime]:
+def get_week_dates(week_start: Optional[datetime] = None) -> Tuple[datetime, ...]:
     """
-    获取一周（周一到周五）的日期列表
+    获取一周（周一到周五）的日期
 
     Args:
         week_start: 周一日期，默认为本周一
 
     Returns:
-        包含周一到周五的日期列表
+        包含周一到周五的日期元组（时间部分为00:00:00）
     """
     if week_start is None:
         week_start = get_week_start()
 
-    # 生成周一到周五的日期
-    week_dates = [week_start + timedelta(days=i) for i in range(5)]
+    return _week_dates_cached(week_start.date())
 
-    return week_dates
+
+@lru_cache(maxsize=8)
+def _week_dates_cached(date_key: date) -> Tuple[datetime, ...]:
+    """按周一日期缓存周一到周五的日期元组"""
+    base = datetime(date_key.year, date_key.month, date_key.day)
+    return tuple(base + timedelta(days=i) for i in range(5))
 
 
 def get_week_number(date_obj: Optional[datetime] = None) -> int:
@@ -95,25 +113,39 @@ def parse_date_flexible(date_value: Union[datetime, str, None]) -> Optional[date
 
     # 字符串格式
     if isinstance(date_value, str):
-        # 尝试多种日期格式
-        date_formats = [
-            "%Y/%m/%d",      # 2025/10/31
-            "%Y-%m-%d",      # 2025-10-31
-            "%Y/%m/%-d",     # 2025/10/5 (Linux/macOS)
-            "%Y/%-m/%d",     # 2025/1/31 (Linux/macOS)
-            "%Y/%-m/%-d",    # 2025/1/5 (Linux/macOS)
-        ]
-
-        for fmt in date_formats:
-            try:
-                return datetime.strptime(date_value, fmt)
-            except ValueError:
-                continue
-
-        logger.warning(f"无法解析日期字符串: {date_value}")
-        return None
+        return _parse_date_string(date_value)
 
-    logger.warning(f"不支持的日期类型: {type(date_value)}")
+    logger.warning("不支持的日期类型: %s", type(date_value))
+    return None
+
+
+@lru_cache(maxsize=1024)
+def _parse_date_string(date_str: str) -> Optional[datetime]:
+    """
+    解析日期字符串（按字符串缓存，Excel 中同一日期字符串会重复出现）
+
+    Args:
+        date_str: 日期字符串
+
+    Returns:
+        解析后的datetime对象，解析失败返回None
+    """
+    # 快速路径：正则直接提取年月日，避免 strptime 的格式解析和异常开销
+    match = _DATE_RE.match(date_str)
+    if match:
+        try:
+            return datetime(int(match[1]), int(match[3]), int(match[4]))
+        except ValueError:
+            logger.warning("无法解析日期字符串: %s", date_str)
+            return None
+
+    for fmt in _FALLBACK_DATE_FORMATS:
+        try:
+            return datetime.strptime(date_str, fmt)
+        except ValueError:
+            continue
+
+    logger.warning("无法解析日期字符串: %s", date_str)
     return None
 
 
@@ -128,6 +160,12 @@ def is_date_match(date1: Union[datetime, str, None], date2: Union[datetime, str,
     Returns:
         是否相同
     """
+    # 同一对象只需解析一次；同为datetime时无需解析
+    if date1 is date2:
+        return parse_date_flexible(date1) is not None
+    if isinstance(date1, datetime) and isinstance(date2, datetime):
+        return date1.date() == date2.date()
+
     parsed1 = parse_date_flexible(date1)
     parsed2 = parse_date_flexible(date2)
 
@@ -147,10 +185,7 @@ def format_date_chinese(date_obj: datetime) -> str:
     Returns:
         "2025年10月31日 周五" 格式
     """
-    weekday_names = ["周一", "周二", "周三", "周四", "周五", "周六", "周日"]
-    weekday = weekday_names[date_obj.weekday()]
-
-    return f"{date_obj.year}年{date_obj.month}月{date_obj.day}日 {weekday}"
+    return f"{date_obj.year}年{date_obj.month}月{date_obj.day}日 {_WEEKDAY_CN[date_obj.weekday()]}"
 
 
 def get_week_range_str(week_start: Optional[datetime] = None) -> str:
@@ -166,6 +201,12 @@ def get_week_range_str(week_start: Optional[datetime] = None) -> str:
     if week_start is None:
         week_start = get_week_start()
 
-    week_end = week_start + timedelta(days=4)  # 周五
+    return _week_range_str_cached(week_start.date())
+
+
+@lru_cache(maxsize=8)
+def _week_range_str_cached(date_key: date) -> str:
+    """按周一日期缓存日期范围字符串"""
+    week_end = date_key + timedelta(days=4)  # 周五
 
-    return f"{week_start.strftime('%Y-%m-%d')} 至 {week_end.strftime('%Y-%m-%d')}"
+    return f"{date_key.isoformat()} 至 {week_end.isoformat()}"
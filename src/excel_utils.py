@@ -0,0 +1,47 @@
+"""
+Excel 文件工具函数模块
+
+提供月报、周报共用的工作簿保存等工具函数
+"""
+
+import os
+import shutil
+import tempfile
+from typing import TYPE_CHECKING, Union
+
+if TYPE_CHECKING:
+    from openpyxl import Workbook
+
+
+def save_workbook_atomically(workbook: "Workbook", file_path: Union[str, os.PathLike]) -> None:
+    """
+    原子地保存工作簿
+
+    先保存到同一目录下的临时文件，再用 os.replace 替换原文件：保存中途出错（磁盘满、进程被终止等）时
+    原文件保持不变，不会留下写了一半的损坏文件。同一文件系统内的替换只是一次改名，不会多写一遍数据。
+
+    目标是符号链接时替换链接指向的真实文件，链接本身保留。替换后是一个新文件，只沿用原文件的权限位：
+    属主、属组、ACL 等扩展属性不会保留，原文件的其他硬链接也不再指向新内容。
+
+    Args:
+        workbook: 要保存的工作簿
+        file_path: 目标文件路径
+    """
+    # 解析符号链接，临时文件建在真实文件所在目录，os.replace 也只替换真实文件
+    file_path = os.path.realpath(file_path)
+    directory = os.path.dirname(file_path)
+    fd, temp_path = tempfile.mkstemp(prefix=".~", suffix=".xlsx", dir=directory)
+    os.close(fd)
+
+    try:
+        workbook.save(temp_path)
+        # mkstemp 创建的文件只有当前用户可读写，替换前沿用原文件的权限
+        if os.path.exists(file_path):
+            shutil.copymode(file_path, temp_path)
+        os.replace(temp_path, file_path)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except FileNotFoundError:
+            pass
+        raise
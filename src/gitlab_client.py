@@ -2,13 +2,30 @@ import os
 import time
 import logging
 import requests
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import List, Optional, Dict, Any
+from functools import lru_cache
+from typing import Any, Dict, Final, List, Optional, Tuple
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 import urllib.parse
 
-from config_manager import config, ConfigurationError
+from config_manager import get_config, ConfigurationError
+
+# 优先使用 orjson 直接从字节解析 JSON，未安装时回退到标准库
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    import json
+    _json_loads = json.loads
+
+# 可选：安装 ijson 后对只需单个字段的列表响应进行流式解析
+try:
+    import ijson
+except ImportError:
+    ijson = None
 
 # 设置默认编码
 import sys
@@ -18,15 +35,69 @@ if hasattr(sys, 'set_default_encoding'):
 logger = logging.getLogger(__name__)
 
 # 常量定义
-DEFAULT_PER_PAGE = 100
-MAX_PAGES = 10
-DEFAULT_TIMEOUT = 10
-API_VERSION = "v4"
+DEFAULT_PER_PAGE: Final = 100
+MAX_PAGES: Final = 10
+DEFAULT_TIMEOUT: Final = 10
+API_VERSION: Final = "v4"
+PREFETCH_PAGES: Final = 2     # 分页时最多提前请求的页数：只预取后面少量页面，避免多余请求触发 GitLab 限流
+HTTP_POOL_SIZE: Final = 32    # 连接池大小（所有客户端共用），需覆盖多项目并发获取时各项目预取分页的请求数
+
+
+@lru_cache(maxsize=1)
+def _get_shared_session() -> requests.Session:
+    """创建带有重试机制的会话
+
+    重试、超时等设置只来自全局配置，与项目无关；多项目模式下各客户端共用同一个会话和连接池，
+    访问同一 GitLab 服务器时复用已建立的 TCP/TLS 连接，不必为每个项目重新握手。
+    连接池本身是线程安全的，可供并发请求共用。
+    """
+    config = get_config()
+    session = requests.Session()
+    
+    # 配置重试策略
+    retry_strategy = Retry(
+        total=config.get("retry_config.max_retries", 3),
+        backoff_factor=config.get("retry_config.backoff_factor", 2),
+        status_forcelist=[429, 500, 502, 503, 504],
+        allowed_methods=["GET"]
+    )
+    
+    # 连接池需容纳并发请求，否则多余的连接用完即关闭，无法复用 keep-alive
+    adapter = HTTPAdapter(
+        max_retries=retry_strategy,
+        pool_connections=HTTP_POOL_SIZE,
+        pool_maxsize=HTTP_POOL_SIZE
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update({
+        "Connection": "keep-alive",
+        "Accept-Encoding": "gzip, deflate"
+    })
+    
+    # 设置默认超时
+    session.timeout = config.get("retry_config.timeout", DEFAULT_TIMEOUT)
+    
+    return session
+
 
 class GitLabClientError(Exception):
     """GitLab客户端异常"""
     pass
 
+
+def _decode_json(content: bytes, description: str) -> Any:
+    """解析 GitLab 响应的 JSON
+
+    orjson/json 的解析错误都是 ValueError，不属于 requests 的异常体系；统一转换为 GitLabClientError，
+    使代理页、登录页等非 JSON 响应和其他请求错误一样被记录并跳过。
+    """
+    try:
+        return _json_loads(content)
+    except ValueError as e:
+        raise GitLabClientError(f"{description}响应不是合法 JSON: {e}")
+
+
 class GitLabClient:
     """GitLab API 客户端，负责获取提交信息"""
     
@@ -38,74 +109,71 @@ class GitLabClient:
         self.project_id = self._get_project_id(project_id)
         self.default_branch = self._get_default_branch(branch)
         
-        if not all([self.base_url, self.project_id, self.token]):
+        # 配置在客户端生命周期内不变，完整性只需判断一次
+        self._config_ok = all([self.base_url, self.project_id, self.token])
+        if not self._config_ok:
             logger.warning("GitLab 配置不完整，某些功能可能无法使用")
         
-        # 确保所有配置值都是字符串且去除可能的注释
+        # 项目ID 的行内注释已在 ConfigManager 加载时去除，这里只统一为字符串
         if self.project_id:
-            self.project_id = str(self.project_id).split('#')[0].strip()
+            self.project_id = str(self.project_id).strip()
         if self.default_branch:
-            self.default_branch = str(self.default_branch).split('#')[0].strip()
+            self.default_branch = str(self.default_branch).strip()
+        
+        # 请求头和 URL 在客户端生命周期内不变，初始化时一次性构建
+        self._headers = {
+            "PRIVATE-TOKEN": self.token,
+            "Content-Type": "application/json; charset=utf-8"
+        }
+        self._project_url = f"{self.base_url}/api/{API_VERSION}/projects/{self.project_id}"
+        self._commits_url = f"{self._project_url}/repository/commits"
+        self._branches_url = f"{self._project_url}/repository/branches"
         
-        logger.info(f"GitLab 客户端初始化 - 项目ID: {self.project_id}, 分支: {self.default_branch}")
+        logger.info("GitLab 客户端初始化 - 项目ID: %s, 分支: %s", self.project_id, self.default_branch)
         self.session = self._create_session()
     
     def _get_base_url(self) -> Optional[str]:
         """获取GitLab基础URL"""
-        url = config.get_env_or_config("GITLAB_URL", "gitlab.url")
+        url = get_config().get_env_or_config("GITLAB_URL", "gitlab.url")
         if url and not url.endswith('/'):
             url = url.rstrip('/')
         return url
     
     def _get_project_id(self, project_id: Optional[str] = None) -> Optional[str]:
         """获取项目ID"""
-        return project_id or config.get_env_or_config("GITLAB_PROJECT_ID", "gitlab.project_id")
+        return project_id or get_config().get_env_or_config("GITLAB_PROJECT_ID", "gitlab.project_id")
     
     def _get_token(self) -> Optional[str]:
         """获取访问令牌"""
-        return config.get_env_or_config("GITLAB_TOKEN", "gitlab.token")
+        return get_config().get_env_or_config("GITLAB_TOKEN", "gitlab.token")
     
     def _get_default_branch(self, branch: Optional[str] = None) -> str:
         """获取默认分支"""
-        return branch or config.get_env_or_config("GITLAB_BRANCH", "gitlab.default_branch", "master")
+        return branch or get_config().get_env_or_config("GITLAB_BRANCH", "gitlab.default_branch", "master")
     
     def _create_session(self) -> requests.Session:
-        """创建带有重试机制的会话"""
-        session = requests.Session()
-        
-        # 配置重试策略
-        retry_strategy = Retry(
-            total=config.get("retry_config.max_retries", 3),
-            backoff_factor=config.get("retry_config.backoff_factor", 2),
-            status_forcelist=[429, 500, 502, 503, 504],
-            allowed_methods=["GET"]
-        )
-        
-        adapter = HTTPAdapter(max_retries=retry_strategy)
-        session.mount("http://", adapter)
-        session.mount("https://", adapter)
-        
-        # 设置默认超时
-        session.timeout = config.get("retry_config.timeout", DEFAULT_TIMEOUT)
-        
-        return session
+        """获取带有重试机制的会话（进程内所有客户端共用，见 _get_shared_session）"""
+        return _get_shared_session()
     
     def fetch_commits(self, date_obj: datetime, branch: Optional[str] = None) -> List[str]:
-        """获取指定日期的提交信息"""
+        """获取指定日期的提交信息
+
+        周末不做跳过：调用方（--run-once、定时任务）只获取明确指定的一天，周末加班的提交同样需要写入日报。
+        """
         if not self._validate_configuration():
             logger.error("GitLab 配置不完整，无法获取提交信息")
             return []
 
         target_branch = branch or self.default_branch
-        logger.info(f"正在获取 {date_obj.strftime('%Y-%m-%d')} 在分支 {target_branch} 的提交信息")
+        logger.info("正在获取 %s 在分支 %s 的提交信息", date_obj.date().isoformat(), target_branch)
 
         try:
             since, until = self._get_date_range(date_obj)
             commits = self._fetch_commits_with_pagination(since, until, target_branch)
-            logger.info(f"成功获取 {len(commits)} 条提交信息")
+            logger.info("成功获取 %d 条提交信息", len(commits))
             return commits
         except Exception as e:
-            logger.error(f"获取提交信息失败: {e}")
+            logger.error("获取提交信息失败: %s", e)
             return []
 
     def fetch_commits_range(
@@ -126,75 +194,90 @@ class GitLabClient:
         target_branch = branch or self.default_branch
         logger.info(
             "正在获取 %s 至 %s 在分支 %s 的提交信息",
-            start_date.strftime('%Y-%m-%d'),
-            end_date.strftime('%Y-%m-%d'),
+            start_date.date().isoformat(),
+            end_date.date().isoformat(),
             target_branch,
         )
 
         try:
             since, until = self._get_date_range(start_date, end_date)
             commits = self._fetch_commits_with_pagination(since, until, target_branch)
-            logger.info(f"成功获取 {len(commits)} 条提交信息")
+            logger.info("成功获取 %d 条提交信息", len(commits))
             return commits
         except Exception as e:
-            logger.error(f"获取提交信息失败: {e}")
+            logger.error("获取提交信息失败: %s", e)
             return []
     
     def _validate_configuration(self) -> bool:
         """验证配置的完整性"""
-        return all([self.base_url, self.project_id, self.token])
+        return self._config_ok
     
     def _fetch_commits_with_pagination(self, since: str, until: str, branch: str) -> List[str]:
         """使用分页获取提交信息"""
-        headers = self._get_headers()
         params = self._get_base_params(since, until, branch)
         
         commits = []
         
-        for page in range(1, MAX_PAGES + 1):
-            params["page"] = page
-            
-            try:
-                data = self._make_api_request(params, headers)
-                if not data:
-                    logger.debug(f"第 {page} 页没有更多数据")
+        # 第 1 页单独请求：大多数日期的提交不足一页，无需进入并发流程
+        data = self._fetch_single_page(params, 1)
+        if not data:
+            return commits
+        
+        commits.extend(self._extract_commit_titles(data))
+        if len(data) < DEFAULT_PER_PAGE:
+            return commits
+        
+        # 第 1 页已满：每处理一页就补发下一页，始终只有后面 PREFETCH_PAGES 页在途（线程数与之相同，请求提交即开始）；
+        # 遇到不满一页即停止，最多多发 PREFETCH_PAGES - 1 个用不上的请求
+        next_page = 2
+        pending = deque()
+        with ThreadPoolExecutor(max_workers=PREFETCH_PAGES) as executor:
+            while True:
+                while next_page <= MAX_PAGES and len(pending) < PREFETCH_PAGES:
+                    pending.append(executor.submit(self._fetch_single_page, params, next_page))
+                    next_page += 1
+                if not pending:
                     break
                 
-                page_commits = self._extract_commit_titles(data)
-                commits.extend(page_commits)
+                data = pending.popleft().result()
+                if not data:
+                    break
                 
-                logger.debug(f"第 {page} 页获取到 {len(page_commits)} 条提交")
+                commits.extend(self._extract_commit_titles(data))
                 
                 # 如果返回的数据少于每页限制，说明已经是最后一页
                 if len(data) < DEFAULT_PER_PAGE:
                     break
-                    
-            except GitLabClientError as e:
-                logger.error(f"获取第 {page} 页数据失败: {e}")
-                break
         
         return commits
     
+    def _fetch_single_page(self, params: Dict[str, Any], page: int) -> Optional[List[Dict[str, Any]]]:
+        """获取单页提交数据，失败时返回 None"""
+        try:
+            # 复制参数，避免并发请求之间共享可变的 page 字段
+            data = self._make_api_request({**params, "page": page})
+        except GitLabClientError as e:
+            logger.error("获取第 %d 页数据失败: %s", page, e)
+            return None
+        
+        if not data:
+            logger.debug("第 %d 页没有更多数据", page)
+        else:
+            logger.debug("第 %d 页获取到 %d 条提交", page, len(data))
+        return data
+    
     def _get_date_range(
         self,
         start_date: datetime,
         end_date: Optional[datetime] = None
-    ) -> tuple[str, str]:
+    ) -> Tuple[str, str]:
         """获取日期范围"""
         end_point = end_date or start_date
-        since = start_date.strftime("%Y-%m-%dT00:00:00Z")
-        until = end_point.strftime("%Y-%m-%dT23:59:59Z")
+        # date.isoformat() 直接生成 YYYY-MM-DD，无需逐字符解析 strftime 格式串
+        since = start_date.date().isoformat() + "T00:00:00Z"
+        until = end_point.date().isoformat() + "T23:59:59Z"
         return since, until
     
-    def _get_headers(self) -> Dict[str, str]:
-        """获取请求头"""
-        # 确保token不包含注释或特殊字符
-        clean_token = str(self.token).split('#')[0].strip()
-        return {
-            "PRIVATE-TOKEN": clean_token,
-            "Content-Type": "application/json; charset=utf-8"
-        }
-    
     def _get_base_params(self, since: str, until: str, branch: str) -> Dict[str, Any]:
         """获取基础请求参数"""
         return {
@@ -205,24 +288,12 @@ class GitLabClient:
             "ref_name": branch
         }
     
-    def _make_api_request(self, params: Dict[str, Any], headers: Dict[str, str]) -> List[Dict[str, Any]]:
+    def _make_api_request(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
         """发起API请求"""
-        # 确保项目ID不包含注释
-        clean_project_id = str(self.project_id).split('#')[0].strip()
-        url = f"{self.base_url}/api/{API_VERSION}/projects/{clean_project_id}/repository/commits"
-        
-        # 确保所有参数都是UTF-8编码的字符串
-        clean_params = {}
-        for key, value in params.items():
-            if isinstance(value, str):
-                clean_params[key] = str(value).split('#')[0].strip()
-            else:
-                clean_params[key] = value
-        
         try:
-            response = self.session.get(url, headers=headers, params=clean_params)
+            response = self.session.get(self._commits_url, headers=self._headers, params=params)
             response.raise_for_status()
-            return response.json()
+            return _decode_json(response.content, "提交列表")
             
         except requests.exceptions.HTTPError as e:
             self._handle_http_error(e)
@@ -249,8 +320,17 @@ class GitLabClient:
             raise GitLabClientError(f"HTTP 错误 {status_code}: {error}")
     
     def _extract_commit_titles(self, commits_data: List[Dict[str, Any]]) -> List[str]:
-        """提取提交标题"""
-        return [commit.get("title", "").strip() for commit in commits_data if commit.get("title")]
+        """提取提交标题（单次遍历，跳过空标题）"""
+        titles = []
+        append = titles.append
+        for commit in commits_data:
+            title = commit.get("title")
+            if title:
+                # 无首尾空白时 strip() 直接返回原字符串，不会产生新对象
+                title = title.strip()
+                if title:
+                    append(title)
+        return titles
     
     def validate_connection(self) -> bool:
         """验证 GitLab 连接是否正常"""
@@ -259,21 +339,16 @@ class GitLabClient:
             return False
         
         try:
-            # 确保项目ID不包含注释
-            clean_project_id = str(self.project_id).split('#')[0].strip()
-            url = f"{self.base_url}/api/{API_VERSION}/projects/{clean_project_id}"
-            headers = self._get_headers()
-            
-            response = self.session.get(url, headers=headers, timeout=5)
+            response = self.session.get(self._project_url, headers=self._headers, timeout=5)
             response.raise_for_status()
             
-            project_info = response.json()
+            project_info = _decode_json(response.content, "项目信息")
             project_name = project_info.get('name', 'Unknown')
-            logger.info(f"GitLab 连接验证成功，项目名称: {project_name}")
+            logger.info("GitLab 连接验证成功，项目名称: %s", project_name)
             return True
             
         except Exception as e:
-            logger.error(f"GitLab 连接验证失败: {e}")
+            logger.error("GitLab 连接验证失败: %s", e)
             return False
     
     def get_project_info(self) -> Optional[Dict[str, Any]]:
@@ -282,18 +357,13 @@ class GitLabClient:
             return None
         
         try:
-            # 确保项目ID不包含注释
-            clean_project_id = str(self.project_id).split('#')[0].strip()
-            url = f"{self.base_url}/api/{API_VERSION}/projects/{clean_project_id}"
-            headers = self._get_headers()
-            
-            response = self.session.get(url, headers=headers)
+            response = self.session.get(self._project_url, headers=self._headers)
             response.raise_for_status()
             
-            return response.json()
+            return _decode_json(response.content, "项目信息")
             
         except Exception as e:
-            logger.error(f"获取项目信息失败: {e}")
+            logger.error("获取项目信息失败: %s", e)
             return None
     
     def get_branches(self) -> List[str]:
@@ -302,19 +372,21 @@ class GitLabClient:
             return []
         
         try:
-            # 确保项目ID不包含注释
-            clean_project_id = str(self.project_id).split('#')[0].strip()
-            url = f"{self.base_url}/api/{API_VERSION}/projects/{clean_project_id}/repository/branches"
-            headers = self._get_headers()
-            
-            response = self.session.get(url, headers=headers)
-            response.raise_for_status()
+            if ijson is None:
+                response = self.session.get(self._branches_url, headers=self._headers)
+                response.raise_for_status()
+                
+                branches_data = _decode_json(response.content, "分支列表")
+                return [branch["name"] for branch in branches_data]
             
-            branches_data = response.json()
-            return [branch["name"] for branch in branches_data]
+            # 流式读取响应，只提取 name 字段，不把每个分支对象都构造成字典
+            with self.session.get(self._branches_url, headers=self._headers, stream=True) as response:
+                response.raise_for_status()
+                response.raw.decode_content = True  # 由 urllib3 负责 gzip 解压
+                return list(ijson.items(response.raw, "item.name"))
             
         except Exception as e:
-            logger.error(f"获取分支列表失败: {e}")
+            logger.error("获取分支列表失败: %s", e)
             return []
 
 # 便捷函数，保持向后兼容
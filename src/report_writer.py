@@ -5,17 +5,22 @@ ReportWriter - 自动化日报写入工具
 参考 webrtc-streamer 的设计理念，提供简洁而强大的命令行界面。
 """
 
-import argparse
 import sys
 import os
 import logging
+import mmap
+import re
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional, List
+from typing import TYPE_CHECKING, Optional, Tuple
 
-from config_manager import config, ConfigurationError
-from updater import ReportUpdater, ReportUpdaterError
-from scheduler import ReportScheduler, SchedulerError
+from config_manager import get_config, ConfigurationError
+
+if TYPE_CHECKING:
+    import argparse
+
+    from updater import ReportUpdater
 
 # 版本信息
 __version__ = "1.0.1"
@@ -23,12 +28,55 @@ __version__ = "1.0.1"
 # 程序信息
 PROGRAM_NAME = "ReportWriter"
 PROGRAM_DESC = "自动化日报写入工具"
+# 进程生命周期内不变，导入时取一次即可
+_PY_VERSION = sys.version.partition(" ")[0]
 
 # 默认配置
 DEFAULT_CONFIG_FILE = "config.json"
 DEFAULT_DATA_DIR = "data"
 DEFAULT_EXCEL_FILE = "月报.xlsx"
 DEFAULT_TEXT_FILE = "日报.txt"
+TEXT_REPORT_HEADER_TEMPLATE = "# 日报记录\n# 格式：日期 - 日报内容\n# 自动生成于：{}\n\n"
+EXCEL_SUFFIX = ".xlsx"
+TEXT_SUFFIX = ".txt"
+TEXT_RECORD_TAIL_BYTES = 4096  # 查找已有记录时优先检查的文件末尾字节数
+MONTHLY_REPORT_KEYWORDS = ("月报",)
+WEEKLY_REPORT_KEYWORDS = ("周报", "周")
+
+# 检查结果图标，按 bool 值索引：STATUS_ICONS[False] 为失败，STATUS_ICONS[True] 为正常
+STATUS_ICONS = ("❌", "✅")
+
+# 健康检查输出的检查项：(health_check() 返回的键, 显示名称)
+HEALTH_CHECK_ITEMS = (
+    ("gitlab_connection", "GitLab连接"),
+    ("deepseek_api_key", "Deepseek API"),
+    ("config_loaded", "配置加载"),
+)
+
+# 命令行参数（argparse 属性名）与其覆盖的环境变量
+CLI_ENV_OVERRIDES = (
+    ("gitlab_url", "GITLAB_URL"),
+    ("gitlab_token", "GITLAB_TOKEN"),
+    ("gitlab_project", "GITLAB_PROJECT_ID"),
+    ("gitlab_branch", "GITLAB_BRANCH"),
+    ("deepseek_key", "DEEPSEEK_API_KEY"),
+)
+
+# 复制粘贴或由脚本生成的参数中可能混入的不可见字符（BOM、零宽空格、行/段分隔符），一次 translate 删除
+_INVISIBLE_CHARS_TRANS = str.maketrans("", "", "\ufeff\u200b\u2028\u2029")
+# 参数值首尾需要去掉的空白与引号
+_CLI_VALUE_TRIM_CHARS = " \t\r\n\"'"
+
+# 参数中的文件/目录路径（argparse 属性名），解析后统一清理
+CLI_PATH_ARGS = ("file", "excel_file", "weekly_file", "template_dir")
+
+# -v 次数对应的日志级别（0=WARNING, 1=INFO, 2及以上=DEBUG）
+_LOG_LEVELS = (logging.WARNING, logging.INFO, logging.DEBUG)
+# -v 及以上时控制台使用的简洁格式，格式器无状态，构建一次后复用
+_CONSOLE_FORMATTER = logging.Formatter('%(levelname)s: %(message)s')
+
+# Excel 锁文件（~$）与 excel_utils.save_workbook_atomically 临时文件（.~）的文件名前缀
+_EXCEL_TEMP_PREFIXES = ("~$", ".~")
 
 logger = logging.getLogger(__name__)
 
@@ -38,44 +86,125 @@ class ReportWriterError(Exception):
     pass
 
 
+@lru_cache(maxsize=8)
+def _scan_excel_files(abs_data_dir: str, mtime_ns: int) -> Tuple[str, ...]:
+    """列出数据目录中的全部Excel文件路径
+
+    结果按（绝对路径, 目录修改时间）缓存：目录中增删文件会改变其修改时间，缓存自动失效，
+    同一次运行中多个查找函数共享一次扫描结果。返回值按路径排序，查找结果不随文件系统的遍历顺序变化。
+    """
+    with os.scandir(abs_data_dir) as entries:
+        # 名为 *.xlsx 的子目录不是Excel文件；is_dir() 使用扫描时缓存的类型信息，不额外 stat。
+        # Excel 打开文件时生成的 ~$ 锁文件、原子保存留下的 .~ 临时文件都不是可读的工作簿，一并跳过
+        return tuple(sorted(
+            entry.path
+            for entry in entries
+            if entry.name.endswith(EXCEL_SUFFIX)
+            and not entry.name.startswith(_EXCEL_TEMP_PREFIXES)
+            and not entry.is_dir()
+        ))
+
+
+def _list_excel_files(data_dir: str) -> Tuple[str, ...]:
+    """获取数据目录中的Excel文件
+
+    目录不存在时由 os.stat 抛出 FileNotFoundError，调用方据此判断，无需事先再检查一次目录是否存在。
+    """
+    abs_data_dir = os.path.abspath(data_dir)
+    mtime_ns = os.stat(abs_data_dir).st_mtime_ns
+    return _scan_excel_files(abs_data_dir, mtime_ns)
+
+
+def _find_excel_by_keywords(
+    data_dir: str, keywords: Tuple[str, ...], fallback_to_any: bool = False
+) -> Optional[str]:
+    """一次遍历查找文件名包含任一关键字的Excel文件
+
+    Args:
+        data_dir: 数据目录路径
+        keywords: 文件名关键字
+        fallback_to_any: 没有匹配关键字时是否返回第一个Excel文件
+
+    Returns:
+        匹配的文件路径，未找到返回None
+
+    Raises:
+        FileNotFoundError: 数据目录不存在
+    """
+    fallback_file = None
+    for excel_file in _list_excel_files(data_dir):
+        name = os.path.basename(excel_file)
+        if any(keyword in name for keyword in keywords):
+            return excel_file
+        if fallback_file is None:
+            fallback_file = excel_file
+    return fallback_file if fallback_to_any else None
+
+
+# 只有 Windows 定义 O_BINARY，其他平台的 os.open 本就不做换行转换
+_O_BINARY = getattr(os, "O_BINARY", 0)
+
+
+def _encode_text_report(text: str) -> bytes:
+    """把写入文本日报的内容编码为 UTF-8 字节，换行统一为 "\n"
+
+    文件头和追加的记录都以二进制方式写入、共用这一编码，AI 摘要中可能出现的 "\r\n" 也在这里统一，
+    同一文件中不会混用 CRLF 和 LF。
+    """
+    return text.replace("\r\n", "\n").replace("\r", "\n").encode('utf-8')
+
+
+def _ensure_text_report(txt_path) -> bool:
+    """文本日报不存在时创建并写入文件头，返回是否为新创建
+
+    使用 O_CREAT | O_EXCL 一次完成“判断不存在并创建”，文件已存在时不做任何写入，
+    避免先检查再创建之间的竞争以及重复写入文件头。Windows 下 os.open 默认是文本模式，会把 "\n" 写成 "\r\n"，
+    需加 O_BINARY，与追加记录时的 'a+b' 一样按原样写入字节。
+    """
+    try:
+        fd = os.open(txt_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY | _O_BINARY, 0o644)
+    except FileExistsError:
+        return False
+    
+    header = TEXT_REPORT_HEADER_TEMPLATE.format(datetime.now().isoformat(" ", "seconds"))
+    try:
+        os.write(fd, _encode_text_report(header))
+    finally:
+        os.close(fd)
+    return True
+
+
 def find_excel_file(data_dir: str = DEFAULT_DATA_DIR) -> Optional[str]:
     """自动查找Excel文件，如果没有找到则创建txt文件"""
-    data_path = Path(data_dir)
+    # 优先返回包含"月报"的文件，其次返回第一个找到的Excel文件
+    try:
+        excel_file = _find_excel_by_keywords(data_dir, MONTHLY_REPORT_KEYWORDS, fallback_to_any=True)
+        data_dir_exists = True
+    except FileNotFoundError:
+        excel_file = None
+        data_dir_exists = False
+    
+    if excel_file:
+        logger.info("找到Excel文件: %s", excel_file)
+        return excel_file
     
     # 确保数据目录存在
-    if not data_path.exists():
+    data_path = Path(data_dir)
+    if not data_dir_exists:
         data_path.mkdir(parents=True, exist_ok=True)
-        logger.info(f"创建数据目录: {data_path}")
-    
-    # 查找.xlsx文件
-    excel_files = list(data_path.glob("*.xlsx"))
-    
-    if excel_files:
-        # 优先返回包含"月报"的文件
-        for file in excel_files:
-            if "月报" in file.name:
-                logger.info(f"找到月报文件: {file}")
-                return str(file)
-        
-        # 返回第一个找到的Excel文件
-        logger.info(f"找到Excel文件: {excel_files[0]}")
-        return str(excel_files[0])
+        logger.info("创建数据目录: %s", data_path)
     
     # 如果没有找到Excel文件，创建txt文件
     logger.info("未找到Excel文件，将创建txt文件用于日报记录")
     txt_file_path = data_path / DEFAULT_TEXT_FILE
     
     # 创建txt文件（如果不存在）
-    if not txt_file_path.exists():
-        try:
-            with open(txt_file_path, 'w', encoding='utf-8') as f:
-                f.write("# 日报记录\n")
-                f.write("# 格式：日期 - 日报内容\n")
-                f.write("# 自动生成于：{}\n\n".format(datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
-            logger.info(f"创建日报文件: {txt_file_path}")
-        except Exception as e:
-            logger.error(f"创建日报文件失败: {e}")
-            return None
+    try:
+        if _ensure_text_report(txt_file_path):
+            logger.info("创建日报文件: %s", txt_file_path)
+    except OSError as e:
+        logger.error("创建日报文件失败: %s", e)
+        return None
     
     return str(txt_file_path)
 
@@ -90,19 +219,15 @@ def find_monthly_report_file(data_dir: str = DEFAULT_DATA_DIR) -> Optional[str]:
     Returns:
         月报文件路径，未找到返回None
     """
-    data_path = Path(data_dir)
-
-    if not data_path.exists():
-        logger.warning(f"数据目录不存在: {data_path}")
-        return None
-
     # 查找包含"月报"的.xlsx文件
-    excel_files = list(data_path.glob("*.xlsx"))
-
-    for file in excel_files:
-        if "月报" in file.name:
-            logger.info(f"找到月报文件: {file}")
-            return str(file)
+    try:
+        monthly_file = _find_excel_by_keywords(data_dir, MONTHLY_REPORT_KEYWORDS)
+    except FileNotFoundError:
+        logger.warning("数据目录不存在: %s", data_dir)
+        return None
+    if monthly_file:
+        logger.info("找到月报文件: %s", monthly_file)
+        return monthly_file
 
     logger.warning("未找到月报文件（文件名需包含'月报'）")
     return None
@@ -118,63 +243,104 @@ def find_weekly_report_file(data_dir: str = DEFAULT_DATA_DIR) -> Optional[str]:
     Returns:
         周报文件路径，未找到返回None
     """
-    data_path = Path(data_dir)
-
-    if not data_path.exists():
-        logger.warning(f"数据目录不存在: {data_path}")
-        return None
-
     # 查找包含"周报"或"周"的.xlsx文件
-    excel_files = list(data_path.glob("*.xlsx"))
-
-    for file in excel_files:
-        if "周报" in file.name or "周" in file.name:
-            logger.info(f"找到周报文件: {file}")
-            return str(file)
+    try:
+        weekly_file = _find_excel_by_keywords(data_dir, WEEKLY_REPORT_KEYWORDS)
+    except FileNotFoundError:
+        logger.warning("数据目录不存在: %s", data_dir)
+        return None
+    if weekly_file:
+        logger.info("找到周报文件: %s", weekly_file)
+        return weekly_file
 
     logger.warning("未找到周报文件（文件名需包含'周报'或'周'）")
     return None
 
 
-def write_to_text_file(txt_path: str, date_obj: datetime, summary: str) -> bool:
-    """写入内容到文本文件"""
+@lru_cache(maxsize=32)
+def _text_record_pattern(target_date: str) -> "re.Pattern[bytes]":
+    """构建匹配行首“日期 -”的字节正则（按日期缓存编译结果）"""
+    return re.compile(rb"(?m)^" + re.escape(target_date.encode('utf-8')) + rb" -")
+
+
+def _has_text_record(f, target_date: str) -> bool:
+    """检查已打开的文本日报（二进制模式）中是否已有指定日期的记录
+
+    通过 mmap 映射文件，由正则引擎直接在字节上查找行首的“日期 -”，命中即停止，不需要解码整个文件；
+    摘要正文中出现的日期不会被误判为已有记录。记录按时间顺序追加，重复执行时当天的记录就在文件末尾，
+    因此先比较最后一行，再查找末尾 TEXT_RECORD_TAIL_BYTES 字节，都未命中时才查找整个文件。
+    无法 mmap 的文件（如部分网络文件系统）退回逐行扫描，内存占用仅为读缓冲区，且命中即停止。
+    """
+    size = os.fstat(f.fileno()).st_size
+    if size == 0:
+        # 空文件无法 mmap，也不可能有记录
+        return False
+    
+    record_prefix = f"{target_date} -".encode('utf-8')
     try:
-        # 读取现有内容
-        existing_content = ""
-        if os.path.exists(txt_path):
-            with open(txt_path, 'r', encoding='utf-8') as f:
-                existing_content = f.read()
-        
-        # 检查是否已存在当天的记录
-        target_date = date_obj.strftime("%Y-%m-%d")
-        if target_date in existing_content:
-            logger.warning(f"日期 {target_date} 的记录已存在，跳过写入")
-            return True
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            # 最常见的重复情况是最后一行就是当天记录，直接比较最后一行的开头
+            last_line_start = mm.rfind(b"\n", 0, size - 1) + 1
+            if mm[last_line_start:last_line_start + len(record_prefix)] == record_prefix:
+                return True
+            
+            pattern = _text_record_pattern(target_date)
+            # (?m)^ 只匹配真正的行首，从中间位置开始查找不会把半行误判为记录
+            tail_start = max(0, size - TEXT_RECORD_TAIL_BYTES)
+            if pattern.search(mm, tail_start) is not None:
+                return True
+            return tail_start > 0 and pattern.search(mm) is not None
+    except (OSError, ValueError) as e:
+        logger.debug("无法映射文本日报，改为逐行扫描: %s", e)
+    
+    f.seek(0)
+    return any(line.startswith(record_prefix) for line in f)
+
+
+def write_to_text_file(txt_path: str, date_obj: datetime, summary: str, *, durable: bool = False) -> bool:
+    """写入内容到文本文件
+
+    记录以一次写入完成；durable 为 True 时在关闭前 fsync，确保记录落盘后才返回成功。
+    """
+    try:
+        # isoformat 不需要每次解析格式串，结果与 strftime("%Y-%m-%d") 相同
+        target_date = date_obj.date().isoformat()
         
-        # 追加新的日报记录
-        with open(txt_path, 'a', encoding='utf-8') as f:
-            f.write(f"{target_date} - {summary}\n")
+        # 只打开一次文件：a+ 模式下文件不存在时自动创建，先检查已有记录再在末尾追加
+        with open(txt_path, 'a+b') as f:
+            # 检查是否已存在当天的记录（只匹配行首的日期，摘要正文中出现的日期不算）
+            if _has_text_record(f, target_date):
+                logger.warning("日期 %s 的记录已存在，跳过写入", target_date)
+                return True
+            
+            # 追加新的日报记录
+            f.write(_encode_text_report(f"{target_date} - {summary}\n"))
+            if durable:
+                f.flush()
+                os.fsync(f.fileno())
         
-        logger.info(f"成功写入日报: {target_date}")
+        logger.info("成功写入日报: %s", target_date)
         return True
         
     except Exception as e:
-        logger.error(f"写入文本文件失败: {e}")
+        logger.error("写入文本文件失败: %s", e)
         return False
 
 
 def is_text_file(file_path: str) -> bool:
-    """检查文件是否为文本文件"""
-    return file_path.lower().endswith('.txt')
+    """检查文件是否为文本文件（扩展名不区分大小写）"""
+    # 只对扩展名部分转小写，不复制整个路径
+    return file_path[-len(TEXT_SUFFIX):].lower() == TEXT_SUFFIX
 
 
 def run_once_mode_text(txt_file: str, date_obj: datetime, hours: int) -> bool:
     """文本文件模式的一次性运行"""
-    logger.info(f"执行文本文件模式更新: {txt_file}, 日期: {date_obj.strftime('%Y-%m-%d')}")
+    date_str = date_obj.date().isoformat()
+    logger.info("执行文本文件模式更新: %s, 日期: %s", txt_file, date_str)
     
     try:
-        # 创建ReportUpdater实例来获取日报数据
-        updater = ReportUpdater()
+        # 获取ReportUpdater实例来获取日报数据
+        updater = get_updater()
         
         # 获取所有项目的提交信息
         all_commits = updater._fetch_all_commits(date_obj)
@@ -186,115 +352,122 @@ def run_once_mode_text(txt_file: str, date_obj: datetime, hours: int) -> bool:
         success = write_to_text_file(txt_file, date_obj, summary)
         
         if success:
-            print(f"✅ 日报更新成功: {date_obj.strftime('%Y-%m-%d')}")
+            print(f"✅ 日报更新成功: {date_str}")
             print(f"📝 日报内容: {summary}")
             return True
         else:
-            print(f"❌ 日报更新失败: {date_obj.strftime('%Y-%m-%d')}")
+            print(f"❌ 日报更新失败: {date_str}")
             return False
             
     except Exception as e:
-        logger.error(f"文本文件模式更新失败: {e}")
+        logger.error("文本文件模式更新失败: %s", e)
         print(f"❌ 更新失败: {e}")
         return False
 
 
+# 版本与帮助文本只依赖模块常量，导入时渲染一次，打印时整段写出
+VERSION_TEXT = f"""\
+{PROGRAM_NAME} v{__version__}
+{PROGRAM_DESC}
+
+构建信息:
+  Python版本: {_PY_VERSION}
+  配置文件: {DEFAULT_CONFIG_FILE}
+  数据目录: {DEFAULT_DATA_DIR}
+"""
+
+HELP_TEXT = f"""\
+./report-writer [-f Excel文件|文本文件] [-d YYYY-MM-DD] [-w 工时] [-v[v[v]]] [--daemon|--run-once|--health-check|--status]
+./report-writer [-C config.json] [--gitlab-url URL] [--gitlab-token TOKEN] [--gitlab-project ID] [--gitlab-branch BRANCH] [--deepseek-key KEY]
+./report-writer -V
+
+  -v[v[v]]           : 日志详细程度 (v=INFO, vv=DEBUG, vvv=TRACE)
+  -V                 : 显示版本信息
+  -C config.json     : 加载配置文件 (默认: config.json)
+  -f 文件路径        : 指定Excel文件或文本文件路径
+  -d YYYY-MM-DD      : 指定日期 (默认: 今天)
+  -w 工时            : 指定工作小时数 (默认: 8，仅Excel模式)
+  [文件路径]         : 要处理的Excel文件或文本文件路径
+
+  --run-once         : 执行一次更新后退出
+  --daemon           : 启动守护进程模式 (定时调度，仅Excel模式)
+  --health-check     : 执行健康检查
+  --status           : 显示调度器状态 (仅Excel模式)
+                       以上模式与 --range-summary、--generate-weekly 互斥，不指定时等同 --run-once
+  --range-summary    : 输出指定项目日期区间的提交摘要
+  --start-date       : 区间开始日期 YYYY-MM-DD
+  --end-date         : 区间结束日期 YYYY-MM-DD
+  --range-project    : 区间摘要模式下指定项目ID
+  --range-branch     : 区间摘要模式下指定分支
+
+  --generate-weekly  : 生成周报（从月报中读取本周日报内容）
+  --weekly-file PATH : 周报文件路径（可选，默认自动查找）
+  --week-start DATE  : 周一日期 YYYY-MM-DD（可选，默认本周一）
+  --use-template     : 从模板目录复制新周报文件到data目录
+  --template-dir PATH: 周报模板目录（默认：data/weekly report template）
+
+  --gitlab-url URL   : GitLab服务器地址
+  --gitlab-token TOKEN : GitLab访问令牌
+  --gitlab-project ID : 项目ID
+  --gitlab-branch BRANCH : 分支名称 (默认: dev)
+
+  --deepseek-key KEY : Deepseek API密钥
+
+文件模式:
+  Excel模式 (.xlsx)  : 完整功能，支持守护进程调度
+  文本模式 (.txt)    : 简单日报记录，不支持守护进程
+  自动模式           : 如果data目录中没有.xlsx文件，自动创建.txt文件
+
+示例:
+  {PROGRAM_NAME}                    # 自动查找Excel文件并执行一次更新
+  {PROGRAM_NAME} --daemon           # 启动定时调度模式
+  {PROGRAM_NAME} -f data/月报.xlsx  # 指定Excel文件
+  {PROGRAM_NAME} -f data/日报.txt   # 指定文本文件
+  {PROGRAM_NAME} -d 2025-01-15      # 指定日期
+  {PROGRAM_NAME} --range-summary --start-date 2025-01-01 --end-date 2025-01-31  # 输出指定区间摘要
+  {PROGRAM_NAME} --generate-weekly                  # 生成本周周报
+  {PROGRAM_NAME} --generate-weekly --use-template # 从模板复制新周报并生成
+  {PROGRAM_NAME} --health-check     # 健康检查
+  {PROGRAM_NAME} -V                 # 显示版本
+"""
+
+
 def print_version():
     """打印版本信息"""
-    print(f"{PROGRAM_NAME} v{__version__}")
-    print(f"{PROGRAM_DESC}")
-    print()
-    print("构建信息:")
-    print(f"  Python版本: {sys.version.split()[0]}")
-    print(f"  配置文件: {DEFAULT_CONFIG_FILE}")
-    print(f"  数据目录: {DEFAULT_DATA_DIR}")
+    sys.stdout.write(VERSION_TEXT)
 
 
 def print_help():
     """打印帮助信息"""
-    print(f"./report-writer [-f Excel文件|文本文件] [-d YYYY-MM-DD] [-w 工时] [-v[v[v]]] [--daemon|--run-once|--health-check|--status]")
-    print(f"./report-writer [-C config.json] [--gitlab-url URL] [--gitlab-token TOKEN] [--gitlab-project ID] [--gitlab-branch BRANCH] [--deepseek-key KEY]")
-    print(f"./report-writer -V")
-    print()
-    print("  -v[v[v]]           : 日志详细程度 (v=INFO, vv=DEBUG, vvv=TRACE)")
-    print("  -V                 : 显示版本信息")
-    print("  -C config.json     : 加载配置文件 (默认: config.json)")
-    print("  -f 文件路径        : 指定Excel文件或文本文件路径")
-    print("  -d YYYY-MM-DD      : 指定日期 (默认: 今天)")
-    print("  -w 工时            : 指定工作小时数 (默认: 8，仅Excel模式)")
-    print("  [文件路径]         : 要处理的Excel文件或文本文件路径")
-    print()
-    print("  --run-once         : 执行一次更新后退出")
-    print("  --daemon           : 启动守护进程模式 (定时调度，仅Excel模式)")
-    print("  --health-check     : 执行健康检查")
-    print("  --status           : 显示调度器状态 (仅Excel模式)")
-    print("  --range-summary    : 输出指定项目日期区间的提交摘要")
-    print("  --start-date       : 区间开始日期 YYYY-MM-DD")
-    print("  --end-date         : 区间结束日期 YYYY-MM-DD")
-    print("  --range-project    : 区间摘要模式下指定项目ID")
-    print("  --range-branch     : 区间摘要模式下指定分支")
-    print()
-    print("  --generate-weekly  : 生成周报（从月报中读取本周日报内容）")
-    print("  --weekly-file PATH : 周报文件路径（可选，默认自动查找）")
-    print("  --week-start DATE  : 周一日期 YYYY-MM-DD（可选，默认本周一）")
-    print("  --use-template     : 从模板目录复制新周报文件到data目录")
-    print("  --template-dir PATH: 周报模板目录（默认：data/weekly report template）")
-    print()
-    print("  --gitlab-url URL   : GitLab服务器地址")
-    print("  --gitlab-token TOKEN : GitLab访问令牌")
-    print("  --gitlab-project ID : 项目ID")
-    print("  --gitlab-branch BRANCH : 分支名称 (默认: dev)")
-    print()
-    print("  --deepseek-key KEY : Deepseek API密钥")
-    print()
-    print("文件模式:")
-    print("  Excel模式 (.xlsx)  : 完整功能，支持守护进程调度")
-    print("  文本模式 (.txt)    : 简单日报记录，不支持守护进程")
-    print("  自动模式           : 如果data目录中没有.xlsx文件，自动创建.txt文件")
-    print()
-    print("示例:")
-    print(f"  {PROGRAM_NAME}                    # 自动查找Excel文件并执行一次更新")
-    print(f"  {PROGRAM_NAME} --daemon           # 启动定时调度模式")
-    print(f"  {PROGRAM_NAME} -f data/月报.xlsx  # 指定Excel文件")
-    print(f"  {PROGRAM_NAME} -f data/日报.txt   # 指定文本文件")
-    print(f"  {PROGRAM_NAME} -d 2025-01-15      # 指定日期")
-    print(f"  {PROGRAM_NAME} --range-summary --start-date 2025-01-01 --end-date 2025-01-31  # 输出指定区间摘要")
-    print(f"  {PROGRAM_NAME} --generate-weekly                  # 生成本周周报")
-    print(f"  {PROGRAM_NAME} --generate-weekly --use-template # 从模板复制新周报并生成")
-    print(f"  {PROGRAM_NAME} --health-check     # 健康检查")
-    print(f"  {PROGRAM_NAME} -V                 # 显示版本")
+    sys.stdout.write(HELP_TEXT)
 
 
 def setup_logging(verbosity: int):
     """设置日志级别"""
-    if verbosity == 0:
-        level = logging.WARNING
-    elif verbosity == 1:
-        level = logging.INFO
-    elif verbosity == 2:
-        level = logging.DEBUG
-    else:
-        level = logging.DEBUG
-    
     # 更新配置中的日志级别
-    logging.getLogger().setLevel(level)
-    
-    # 为控制台输出设置更简洁的格式
-    console_handler = None
-    for handler in logging.getLogger().handlers:
-        if isinstance(handler, logging.StreamHandler) and handler.stream == sys.stderr:
-            console_handler = handler
-            break
+    logging.getLogger().setLevel(_LOG_LEVELS[min(verbosity, len(_LOG_LEVELS) - 1)])
     
-    if console_handler and verbosity > 0:
-        console_handler.setFormatter(
-            logging.Formatter('%(levelname)s: %(message)s')
-        )
+    # 为控制台输出设置更简洁的格式（控制台处理器由 ConfigManager 创建并保留引用）
+    if verbosity > 0:
+        console_handler = get_config().console_handler
+        if console_handler is not None:
+            console_handler.setFormatter(_CONSOLE_FORMATTER)
+
+
+def normalize_cli_value(value: str) -> str:
+    """清理从终端或脚本传入的参数值：去除 BOM/零宽字符，以及首尾的空白和引号"""
+    return value.translate(_INVISIBLE_CHARS_TRANS).strip(_CLI_VALUE_TRIM_CHARS)
 
 
 def validate_date(date_str: str) -> datetime:
     """验证并解析日期字符串"""
+    date_str = normalize_cli_value(date_str)
     try:
+        # 标准的 YYYY-MM-DD 走 C 实现的 fromisoformat；先校验分隔符位置，
+        # 避免放行 2025-W03-1 这类同样长度的 ISO 周日期
+        if len(date_str) == 10 and date_str[4] == "-" and date_str[7] == "-":
+            return datetime.fromisoformat(date_str)
+        # 其他写法（如 2025-1-5）仍按原有的 strptime 规则解析
         return datetime.strptime(date_str, "%Y-%m-%d")
     except ValueError:
         raise ReportWriterError(f"日期格式错误: {date_str}，应为 YYYY-MM-DD")
@@ -311,7 +484,19 @@ def validate_hours(hours_str: str) -> int:
         raise ReportWriterError(f"工作小时数必须是整数: {hours_str}")
 
 
-def resolve_project_id_for_range(updater: ReportUpdater, range_project: Optional[str], cli_project: Optional[str]) -> str:
+@lru_cache(maxsize=1)
+def get_updater() -> "ReportUpdater":
+    """获取进程内共享的 ReportUpdater 实例
+
+    更新器初始化时会读取配置并创建 GitLab/Deepseek 客户端，共享同一实例可以复用 HTTP 连接池。
+    """
+    # 更新器依赖 openpyxl/openai 等较重的模块，只在真正需要时导入
+    from updater import ReportUpdater
+
+    return ReportUpdater()
+
+
+def resolve_project_id_for_range(updater: "ReportUpdater", range_project: Optional[str], cli_project: Optional[str]) -> str:
     """解析区间摘要模式使用的项目ID"""
     if range_project:
         return str(range_project)
@@ -319,16 +504,22 @@ def resolve_project_id_for_range(updater: ReportUpdater, range_project: Optional
     if cli_project:
         return str(cli_project)
 
-    project_ids = []
+    # 一次遍历：遇到第二个不同的项目ID即可判定无法自动选择
+    first_project_id = None
     for project in updater.projects or []:
         project_id = project.get("id")
-        if project_id:
-            project_ids.append(str(project_id))
-
-    if len(set(project_ids)) == 1:
-        return project_ids[0]
-
-    if not project_ids and updater.gitlab_client and updater.gitlab_client.project_id:
+        if not project_id:
+            continue
+        project_id = str(project_id)
+        if first_project_id is None:
+            first_project_id = project_id
+        elif project_id != first_project_id:
+            raise ReportWriterError("存在多个项目或未配置项目，请使用 --range-project 指定项目ID")
+
+    if first_project_id is not None:
+        return first_project_id
+
+    if updater.gitlab_client and updater.gitlab_client.project_id:
         return str(updater.gitlab_client.project_id)
 
     raise ReportWriterError("存在多个项目或未配置项目，请使用 --range-project 指定项目ID")
@@ -340,25 +531,28 @@ def run_once_mode(excel_file: str, date_obj: datetime, hours: int) -> bool:
     if is_text_file(excel_file):
         return run_once_mode_text(excel_file, date_obj, hours)
     
-    logger.info(f"执行一次更新: {excel_file}, 日期: {date_obj.strftime('%Y-%m-%d')}, 工时: {hours}")
+    date_str = date_obj.date().isoformat()
+    logger.info("执行一次更新: %s, 日期: %s, 工时: %s", excel_file, date_str, hours)
     
+    from updater import ReportUpdaterError
+
     try:
-        updater = ReportUpdater()
+        updater = get_updater()
         success = updater.update_daily_report(excel_file, date_obj, hours)
         
         if success:
-            print(f"✅ 日报更新成功: {date_obj.strftime('%Y-%m-%d')}")
+            print(f"✅ 日报更新成功: {date_str}")
             return True
         else:
-            print(f"❌ 日报更新失败: {date_obj.strftime('%Y-%m-%d')}")
+            print(f"❌ 日报更新失败: {date_str}")
             return False
             
     except ReportUpdaterError as e:
-        logger.error(f"更新失败: {e}")
+        logger.error("更新失败: %s", e)
         print(f"❌ 更新失败: {e}")
         return False
     except Exception as e:
-        logger.error(f"程序执行失败: {e}")
+        logger.error("程序执行失败: %s", e)
         print(f"❌ 程序执行失败: {e}")
         return False
 
@@ -370,8 +564,11 @@ def daemon_mode(excel_file: str) -> bool:
         print("❌ 文本文件模式不支持守护进程调度，请使用Excel文件")
         return False
     
-    logger.info(f"启动守护进程模式: {excel_file}")
+    logger.info("启动守护进程模式: %s", excel_file)
     
+    # 调度器会引入 APScheduler，只在调度相关模式下导入
+    from scheduler import ReportScheduler, SchedulerError
+
     try:
         scheduler = ReportScheduler(excel_file)
         
@@ -390,11 +587,11 @@ def daemon_mode(excel_file: str) -> bool:
         return True
         
     except SchedulerError as e:
-        logger.error(f"调度器错误: {e}")
+        logger.error("调度器错误: %s", e)
         print(f"❌ 调度器错误: {e}")
         return False
     except Exception as e:
-        logger.error(f"程序执行失败: {e}")
+        logger.error("程序执行失败: %s", e)
         print(f"❌ 程序执行失败: {e}")
         return False
 
@@ -404,13 +601,14 @@ def health_check_mode() -> bool:
     logger.info("执行健康检查")
     
     try:
-        updater = ReportUpdater()
+        updater = get_updater()
         status = updater.health_check()
         
-        print("🔍 健康检查结果:")
-        print(f"  GitLab连接: {'✅' if status.get('gitlab_connection') else '❌'}")
-        print(f"  Deepseek API: {'✅' if status.get('deepseek_api_key') else '❌'}")
-        print(f"  配置加载: {'✅' if status.get('config_loaded') else '❌'}")
+        lines = ["🔍 健康检查结果:"]
+        lines.extend(
+            f"  {label}: {STATUS_ICONS[bool(status.get(key))]}" for key, label in HEALTH_CHECK_ITEMS
+        )
+        print("\n".join(lines))
         
         all_good = all(status.values())
         if all_good:
@@ -421,7 +619,7 @@ def health_check_mode() -> bool:
         return all_good
         
     except Exception as e:
-        logger.error(f"健康检查失败: {e}")
+        logger.error("健康检查失败: %s", e)
         print(f"❌ 健康检查失败: {e}")
         return False
 
@@ -435,6 +633,8 @@ def status_mode(excel_file: str) -> bool:
     
     logger.info("查看调度器状态")
     
+    from scheduler import ReportScheduler
+
     try:
         scheduler = ReportScheduler(excel_file)
         status = scheduler.get_job_status()
@@ -446,13 +646,229 @@ def status_mode(excel_file: str) -> bool:
         return True
         
     except Exception as e:
-        logger.error(f"查看状态失败: {e}")
+        logger.error("查看状态失败: %s", e)
         print(f"❌ 查看状态失败: {e}")
         return False
 
 
-def main():
-    """主函数"""
+# main() 顶层异常的处理方式：异常类型 -> (提示前缀, 退出码, 是否附带异常信息)
+# 按异常类的 MRO 查找，子类自动继承父类的处理方式；未登记的异常按程序执行失败处理
+MAIN_EXCEPTION_HANDLERS = {
+    ReportWriterError: ("❌ ", 1, True),
+    ConfigurationError: ("❌ 配置错误: ", 1, True),
+    KeyboardInterrupt: ("\n👋 用户中断，程序退出", 0, False),
+}
+
+
+def handle_main_exception(error: BaseException) -> int:
+    """输出 main() 中未处理异常的提示信息，并返回退出码"""
+    handler = next(
+        (MAIN_EXCEPTION_HANDLERS[cls] for cls in type(error).__mro__ if cls in MAIN_EXCEPTION_HANDLERS),
+        None,
+    )
+    if handler is None:
+        logger.error("程序执行失败: %s", error)
+        handler = ("❌ 程序执行失败: ", 1, True)
+    
+    prefix, exit_code, show_error = handler
+    print(f"{prefix}{error}" if show_error else prefix)
+    return exit_code
+
+
+# 只需要数据文件路径的模式；一次性运行还需要日期和工时，单独处理
+FILE_MODE_HANDLERS = {
+    "status": status_mode,
+    "daemon": daemon_mode,
+}
+
+
+def health_check_command(args: "argparse.Namespace") -> int:
+    """健康检查模式（命令行入口）"""
+    return 0 if health_check_mode() else 1
+
+
+def range_summary_command(args: "argparse.Namespace") -> int:
+    """区间摘要模式：输出指定项目日期区间的提交列表和摘要"""
+    if not args.start_date or not args.end_date:
+        raise ReportWriterError("区间摘要模式需要同时提供 --start-date 和 --end-date")
+
+    start_date = validate_date(args.start_date)
+    end_date = validate_date(args.end_date)
+
+    if end_date < start_date:
+        raise ReportWriterError("结束日期不能早于开始日期")
+
+    updater = get_updater()
+    project_id = resolve_project_id_for_range(updater, args.range_project, args.gitlab_project)
+    result = updater.summarize_project_range(project_id, start_date, end_date, args.range_branch)
+    commits = result.get("commits", [])
+    branch_name = result.get("branch")
+
+    print(f"📦 项目ID: {result['projectId']} (分支: {branch_name})")
+    print(f"📅 日期范围: {start_date.date().isoformat()} 至 {end_date.date().isoformat()}")
+    print(f"📊 提交数量: {result.get('commitCount', 0)}")
+
+    if commits:
+        # 提交可能有成百上千条，拼接后一次写出
+        sys.stdout.write("🔖 提交列表:\n" + "".join(
+            f"  {index}. {commit}\n" for index, commit in enumerate(commits, 1)
+        ))
+    else:
+        print("🔖 提交列表: 无提交记录")
+
+    summary_text = result.get("summary") or "无提交"
+    print("\n📝 提交摘要:")
+    print(summary_text)
+
+    return 0
+
+
+def generate_weekly_command(args: "argparse.Namespace") -> int:
+    """周报生成模式：从月报中读取本周日报内容写入周报"""
+    from weekly_report_writer import WeeklyReportWriter, WeeklyReportWriterError
+
+    # 查找月报文件
+    monthly_file = args.file or find_monthly_report_file()
+    if not monthly_file:
+        print("❌ 未找到月报文件，请使用 -f 选项指定月报文件路径")
+        print("   提示：月报文件名需包含'月报'")
+        return 1
+
+    # 解析周一日期
+    week_start = None
+    if args.week_start:
+        week_start = validate_date(args.week_start)
+
+    # 处理周报文件（使用模板或指定文件）
+    if args.use_template:
+        # 使用模板复制模式
+        template_dir = args.template_dir or "data/weekly report template"
+        print(f"📁 月报文件: {monthly_file}")
+        print(f"📋 模板目录: {template_dir}")
+        print(f"📅 周期: {week_start.date().isoformat() if week_start else '本周'}")
+
+        try:
+            # 初始化时自动从模板复制
+            writer = WeeklyReportWriter(
+                monthly_file,
+                weekly_report_path="data",  # 传入目录，模板会复制到这里
+                use_template=True,
+                template_dir=template_dir,
+                week_start_date=week_start
+            )
+            success = writer.generate_weekly_report(week_start)
+
+            if success:
+                print(f"✅ 周报生成成功: {writer.weekly_report_path.name}")
+                return 0
+            else:
+                print("❌ 周报生成失败")
+                return 1
+
+        except WeeklyReportWriterError as e:
+            print(f"❌ 周报生成失败: {e}")
+            return 1
+    else:
+        # 使用指定的周报文件
+        weekly_file = args.weekly_file or find_weekly_report_file()
+        if not weekly_file:
+            print("❌ 未找到周报文件，请使用 --weekly-file 选项指定周报文件路径")
+            print("   提示：周报文件名需包含'周报'或'周'，或使用 --use-template 从模板复制")
+            return 1
+
+        print(f"📁 月报文件: {monthly_file}")
+        print(f"📋 周报文件: {weekly_file}")
+
+        try:
+            writer = WeeklyReportWriter(monthly_file, weekly_file)
+            success = writer.generate_weekly_report(week_start)
+
+            if success:
+                print("✅ 周报生成成功")
+                return 0
+            else:
+                print("❌ 周报生成失败")
+                return 1
+
+        except WeeklyReportWriterError as e:
+            print(f"❌ 周报生成失败: {e}")
+            return 1
+
+
+def data_file_command(args: "argparse.Namespace") -> int:
+    """日报数据文件相关模式：确定 Excel/文本文件后执行一次更新、守护进程或状态查看"""
+    # 确定Excel文件路径
+    excel_file = args.file or args.excel_file
+    found_automatically = not excel_file
+    if found_automatically:
+        excel_file = find_excel_file()
+        if not excel_file:
+            print("❌ 未找到Excel文件且无法创建文本文件，请使用 -f 选项指定文件路径")
+            return 1
+
+        # 判断是新创建的文本文件还是找到的Excel文件
+        if is_text_file(excel_file):
+            print(f"📝 自动创建文本文件: {excel_file}")
+        else:
+            print(f"📁 自动找到Excel文件: {excel_file}")
+
+    # 验证用户指定的文件存在（对于txt文件，如果不存在则自动创建）；自动查找的文件已由目录扫描确认存在，
+    # 或刚刚创建，无需再检查
+    if not found_automatically:
+        if is_text_file(excel_file):
+            # 对于文本文件，如果不存在则自动创建（已存在时不改动）
+            try:
+                # 确保目录存在
+                file_dir = os.path.dirname(excel_file)
+                if file_dir:
+                    os.makedirs(file_dir, exist_ok=True)
+                if _ensure_text_report(excel_file):
+                    print(f"📝 自动创建文本文件: {excel_file}")
+            except OSError as e:
+                print(f"❌ 创建文本文件失败: {e}")
+                return 1
+        else:
+            # 直接 stat 一次：只有文件不存在时在这里提示，无权限等其他错误交给 main 的通用异常处理
+            try:
+                os.stat(excel_file)
+            except FileNotFoundError:
+                print(f"❌ 文件不存在: {excel_file}")
+                return 1
+
+    # 状态查看 / 守护进程模式
+    file_mode_handler = FILE_MODE_HANDLERS.get(args.mode)
+    if file_mode_handler:
+        success = file_mode_handler(excel_file)
+        return 0 if success else 1
+
+    # 默认或指定的一次性运行模式
+    date_obj = validate_date(args.date) if args.date else datetime.now()
+    hours = args.hours
+
+    success = run_once_mode(excel_file, date_obj, hours)
+    return 0 if success else 1
+
+
+# 各模式（args.mode）的命令行入口；未指定模式时为一次性运行
+MODE_COMMANDS = {
+    "health_check": health_check_command,
+    "range_summary": range_summary_command,
+    "generate_weekly": generate_weekly_command,
+    "run_once": data_file_command,
+    "daemon": data_file_command,
+    "status": data_file_command,
+}
+
+
+@lru_cache(maxsize=1)
+def _build_parser() -> "argparse.ArgumentParser":
+    """构建命令行参数解析器
+
+    解析器只依赖静态定义，缓存后在测试或重复调用 main() 时复用同一个实例。
+    """
+    # 只在真正需要解析参数时导入 argparse；单独的 -h/-V 在 main() 中直接处理
+    import argparse
+
     parser = argparse.ArgumentParser(
         description=f"{PROGRAM_NAME} - {PROGRAM_DESC}",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -491,11 +907,14 @@ def main():
     parser.add_argument("-w", "--hours", type=int, default=8, help="工作小时数")
     parser.add_argument("excel_file", nargs="?", help="Excel文件路径")
     
-    # 模式选项
-    parser.add_argument("--run-once", action="store_true", help="执行一次更新后退出")
-    parser.add_argument("--daemon", action="store_true", help="启动守护进程模式")
-    parser.add_argument("--health-check", action="store_true", help="执行健康检查")
-    parser.add_argument("--status", action="store_true", help="显示调度器状态")
+    # 模式选项：各模式互斥，统一写入 args.mode，未指定时为一次性运行
+    mode_group = parser.add_mutually_exclusive_group()
+    mode_group.add_argument("--run-once", dest="mode", action="store_const", const="run_once", help="执行一次更新后退出")
+    mode_group.add_argument("--daemon", dest="mode", action="store_const", const="daemon", help="启动守护进程模式")
+    mode_group.add_argument("--health-check", dest="mode", action="store_const", const="health_check", help="执行健康检查")
+    mode_group.add_argument("--status", dest="mode", action="store_const", const="status", help="显示调度器状态")
+    mode_group.add_argument("--range-summary", dest="mode", action="store_const", const="range_summary", help="输出指定项目日期区间的提交摘要")
+    mode_group.add_argument("--generate-weekly", dest="mode", action="store_const", const="generate_weekly", help="生成周报")
     
     # GitLab选项
     parser.add_argument("--gitlab-url", help="GitLab服务器地址")
@@ -507,20 +926,37 @@ def main():
     parser.add_argument("--deepseek-key", help="Deepseek API密钥")
 
     # 区间摘要模式
-    parser.add_argument("--range-summary", action="store_true", help="输出指定项目日期区间的提交摘要")
     parser.add_argument("--start-date", help="日期区间开始 YYYY-MM-DD")
     parser.add_argument("--end-date", help="日期区间结束 YYYY-MM-DD")
     parser.add_argument("--range-project", help="区间摘要模式下的项目ID")
     parser.add_argument("--range-branch", help="区间摘要模式下的分支名称")
 
     # 周报生成模式
-    parser.add_argument("--generate-weekly", action="store_true", help="生成周报")
     parser.add_argument("--weekly-file", help="周报文件路径")
     parser.add_argument("--week-start", help="周一日期 YYYY-MM-DD，默认本周一")
     parser.add_argument("--use-template", action="store_true", help="使用周报模板复制到data目录生成新周报")
     parser.add_argument("--template-dir", help="周报模板目录路径（默认：data/weekly report template）")
 
-    args = parser.parse_args()
+    return parser
+
+
+def main():
+    """主函数"""
+    # 只查看帮助或版本时不需要构建解析器
+    argv = sys.argv[1:]
+    if argv in (["-h"], ["--help"]):
+        print_help()
+        return 0
+    
+    if argv in (["-V"], ["--version"]):
+        print_version()
+        return 0
+    
+    args = _build_parser().parse_args(argv)
+    for arg_name in CLI_PATH_ARGS:
+        value = getattr(args, arg_name)
+        if value:
+            setattr(args, arg_name, normalize_cli_value(value))
     
     # 处理帮助和版本
     if args.help:
@@ -531,199 +967,27 @@ def main():
         print_version()
         return 0
     
+    # 先加载配置（同时完成日志初始化），再按命令行参数调整日志级别，避免被配置中的级别覆盖
+    try:
+        get_config()
+    except ConfigurationError as e:
+        print(f"❌ 配置错误: {e}")
+        return 1
+    
     # 设置日志级别
     setup_logging(args.verbose)
     
     try:
-        # 临时设置环境变量（如果通过命令行提供）
-        if args.gitlab_url:
-            os.environ["GITLAB_URL"] = args.gitlab_url
-        if args.gitlab_token:
-            os.environ["GITLAB_TOKEN"] = args.gitlab_token
-        if args.gitlab_project:
-            os.environ["GITLAB_PROJECT_ID"] = args.gitlab_project
-        if args.gitlab_branch:
-            os.environ["GITLAB_BRANCH"] = args.gitlab_branch
-        if args.deepseek_key:
-            os.environ["DEEPSEEK_API_KEY"] = args.deepseek_key
+        # 命令行提供的 GitLab/Deepseek 参数交给配置管理器，优先于环境变量生效
+        cli_values = ((env_name, getattr(args, arg_name)) for arg_name, env_name in CLI_ENV_OVERRIDES)
+        env_overrides = {env_name: value for env_name, value in cli_values if value}
+        if env_overrides:
+            get_config().set_cli_overrides(env_overrides)
         
-        # 健康检查模式
-        if args.health_check:
-            success = health_check_mode()
-            return 0 if success else 1
-
-        # 区间摘要模式
-        if args.range_summary:
-            if not args.start_date or not args.end_date:
-                raise ReportWriterError("区间摘要模式需要同时提供 --start-date 和 --end-date")
-
-            start_date = validate_date(args.start_date)
-            end_date = validate_date(args.end_date)
-
-            if end_date < start_date:
-                raise ReportWriterError("结束日期不能早于开始日期")
-
-            updater = ReportUpdater()
-            project_id = resolve_project_id_for_range(updater, args.range_project, args.gitlab_project)
-            result = updater.summarize_project_range(project_id, start_date, end_date, args.range_branch)
-            commits = result.get("commits", [])
-            branch_name = result.get("branch")
-
-            print(f"📦 项目ID: {result['projectId']} (分支: {branch_name})")
-            print(
-                f"📅 日期范围: {start_date.strftime('%Y-%m-%d')} 至 {end_date.strftime('%Y-%m-%d')}"
-            )
-            print(f"📊 提交数量: {result.get('commitCount', 0)}")
-
-            if commits:
-                print("🔖 提交列表:")
-                for index, commit in enumerate(commits, 1):
-                    print(f"  {index}. {commit}")
-            else:
-                print("🔖 提交列表: 无提交记录")
-
-            summary_text = result.get("summary") or "无提交"
-            print("\n📝 提交摘要:")
-            print(summary_text)
-
-            return 0
-
-        # 周报生成模式
-        if args.generate_weekly:
-            from weekly_report_writer import WeeklyReportWriter, WeeklyReportWriterError
-
-            # 查找月报文件
-            monthly_file = args.file or find_monthly_report_file()
-            if not monthly_file:
-                print("❌ 未找到月报文件，请使用 -f 选项指定月报文件路径")
-                print("   提示：月报文件名需包含'月报'")
-                return 1
-
-            # 解析周一日期
-            week_start = None
-            if args.week_start:
-                week_start = validate_date(args.week_start)
-
-            # 处理周报文件（使用模板或指定文件）
-            if args.use_template:
-                # 使用模板复制模式
-                template_dir = args.template_dir or "data/weekly report template"
-                print(f"📁 月报文件: {monthly_file}")
-                print(f"📋 模板目录: {template_dir}")
-                print(f"📅 周期: {week_start.strftime('%Y-%m-%d') if week_start else '本周'}")
-
-                try:
-                    # 初始化时自动从模板复制
-                    writer = WeeklyReportWriter(
-                        monthly_file,
-                        weekly_report_path="data",  # 传入目录，模板会复制到这里
-                        use_template=True,
-                        template_dir=template_dir,
-                        week_start_date=week_start
-                    )
-                    success = writer.generate_weekly_report(week_start)
-
-                    if success:
-                        print(f"✅ 周报生成成功: {writer.weekly_report_path.name}")
-                        return 0
-                    else:
-                        print("❌ 周报生成失败")
-                        return 1
-
-                except WeeklyReportWriterError as e:
-                    print(f"❌ 周报生成失败: {e}")
-                    return 1
-            else:
-                # 使用指定的周报文件
-                weekly_file = args.weekly_file or find_weekly_report_file()
-                if not weekly_file:
-                    print("❌ 未找到周报文件，请使用 --weekly-file 选项指定周报文件路径")
-                    print("   提示：周报文件名需包含'周报'或'周'，或使用 --use-template 从模板复制")
-                    return 1
-
-                print(f"📁 月报文件: {monthly_file}")
-                print(f"📋 周报文件: {weekly_file}")
-
-                try:
-                    writer = WeeklyReportWriter(monthly_file, weekly_file)
-                    success = writer.generate_weekly_report(week_start)
-
-                    if success:
-                        print("✅ 周报生成成功")
-                        return 0
-                    else:
-                        print("❌ 周报生成失败")
-                        return 1
-
-                except WeeklyReportWriterError as e:
-                    print(f"❌ 周报生成失败: {e}")
-                    return 1
-
-        # 确定Excel文件路径
-        excel_file = args.file or args.excel_file
-        if not excel_file:
-            excel_file = find_excel_file()
-            if not excel_file:
-                print("❌ 未找到Excel文件且无法创建文本文件，请使用 -f 选项指定文件路径")
-                return 1
-            
-            # 判断是新创建的文本文件还是找到的Excel文件
-            if is_text_file(excel_file):
-                print(f"📝 自动创建文本文件: {excel_file}")
-            else:
-                print(f"📁 自动找到Excel文件: {excel_file}")
-        
-        # 验证文件存在（对于txt文件，如果不存在则自动创建）
-        if not os.path.exists(excel_file):
-            if is_text_file(excel_file):
-                # 对于文本文件，如果不存在则自动创建
-                try:
-                    # 确保目录存在
-                    file_dir = os.path.dirname(excel_file)
-                    if file_dir:
-                        os.makedirs(file_dir, exist_ok=True)
-                    with open(excel_file, 'w', encoding='utf-8') as f:
-                        f.write("# 日报记录\n")
-                        f.write("# 格式：日期 - 日报内容\n")
-                        f.write("# 自动生成于：{}\n\n".format(datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
-                    print(f"📝 自动创建文本文件: {excel_file}")
-                except Exception as e:
-                    print(f"❌ 创建文本文件失败: {e}")
-                    return 1
-            else:
-                print(f"❌ 文件不存在: {excel_file}")
-                return 1
-        
-        # 状态查看模式
-        if args.status:
-            success = status_mode(excel_file)
-            return 0 if success else 1
+        return MODE_COMMANDS[args.mode or "run_once"](args)
         
-        # 守护进程模式
-        if args.daemon:
-            success = daemon_mode(excel_file)
-            return 0 if success else 1
-        
-        # 默认或指定的一次性运行模式
-        date_obj = validate_date(args.date) if args.date else datetime.now()
-        hours = args.hours
-        
-        success = run_once_mode(excel_file, date_obj, hours)
-        return 0 if success else 1
-        
-    except ReportWriterError as e:
-        print(f"❌ {e}")
-        return 1
-    except ConfigurationError as e:
-        print(f"❌ 配置错误: {e}")
-        return 1
-    except KeyboardInterrupt:
-        print("\n👋 用户中断，程序退出")
-        return 0
-    except Exception as e:
-        logger.error(f"程序执行失败: {e}")
-        print(f"❌ 程序执行失败: {e}")
-        return 1
+    except (Exception, KeyboardInterrupt) as e:
+        return handle_main_exception(e)
 
 
 if __name__ == "__main__":
@@ -2,6 +2,7 @@ import logging
 import os
 import signal
 import sys
+import threading
 from datetime import datetime
 from typing import Optional, Dict, Any
 
@@ -9,7 +10,7 @@ from apscheduler.schedulers.blocking import BlockingScheduler
 from apscheduler.triggers.cron import CronTrigger
 from apscheduler.events import EVENT_JOB_EXECUTED, EVENT_JOB_ERROR
 
-from config_manager import config, ConfigurationError
+from config_manager import get_config, ConfigurationError
 from updater import ReportUpdater, ReportUpdaterError
 
 logger = logging.getLogger(__name__)
@@ -19,11 +20,19 @@ DEFAULT_SCHEDULE_HOUR = 18
 DEFAULT_SCHEDULE_MINUTE = 0
 DEFAULT_TIMEZONE = "Asia/Shanghai"
 MISFIRE_GRACE_TIME = 3600  # 1小时
+EXCEL_SUFFIX = ".xlsx"
 
 class SchedulerError(Exception):
     """调度器异常"""
     pass
 
+def _job_listener(event) -> None:
+    """记录任务执行结果（由 APScheduler 在事件分发时调用，日志级别不满足时不格式化消息）"""
+    if event.exception:
+        logger.error("任务执行失败: %s", event.exception)
+    else:
+        logger.info("任务执行成功: %s", event.job_id)
+
 class ReportScheduler:
     """日报调度器，负责定时执行日报更新任务"""
     
@@ -32,6 +41,8 @@ class ReportScheduler:
         self.updater = ReportUpdater()
         self.scheduler = BlockingScheduler()
         self.is_running = False
+        # 调度配置在初始化时解析一次，之后直接使用
+        self.schedule_config = self._get_schedule_config()
         
         # 设置信号处理
         self._setup_signal_handlers()
@@ -44,10 +55,13 @@ class ReportScheduler:
     
     def _validate_excel_path(self, excel_path: str) -> str:
         """验证Excel文件路径"""
-        if not os.path.exists(excel_path):
+        try:
+            os.stat(excel_path)
+        except FileNotFoundError:
             raise SchedulerError(f"Excel 文件不存在: {excel_path}")
         
-        if not excel_path.lower().endswith('.xlsx'):
+        # 只对扩展名部分转小写，不复制整个路径
+        if excel_path[-len(EXCEL_SUFFIX):].lower() != EXCEL_SUFFIX:
             raise SchedulerError(f"文件格式不正确，需要 .xlsx 文件: {excel_path}")
         
         return excel_path
@@ -55,7 +69,7 @@ class ReportScheduler:
     def _setup_signal_handlers(self) -> None:
         """设置信号处理器"""
         def signal_handler(signum, frame):
-            logger.info(f"收到信号 {signum}，正在优雅关闭...")
+            logger.info("收到信号 %s，正在优雅关闭...", signum)
             self.shutdown()
             sys.exit(0)
         
@@ -64,14 +78,13 @@ class ReportScheduler:
     
     def _setup_scheduler(self) -> None:
         """设置调度任务"""
-        if not config.get("schedule.enabled", True):
+        if not get_config().get("schedule.enabled", True):
             logger.info("调度功能已禁用")
             return
         
-        # 从配置中获取调度时间
-        schedule_config = self._get_schedule_config()
+        schedule_config = self.schedule_config
         
-        logger.info(f"设置定时任务: 每天 {schedule_config['hour']:02d}:{schedule_config['minute']:02d} ({schedule_config['timezone']})")
+        logger.info("设置定时任务: 每天 %02d:%02d (%s)", schedule_config['hour'], schedule_config['minute'], schedule_config['timezone'])
         
         # 创建 cron 触发器
         trigger = CronTrigger(
@@ -92,22 +105,20 @@ class ReportScheduler:
         )
     
     def _get_schedule_config(self) -> Dict[str, Any]:
-        """获取调度配置"""
-        return {
-            'hour': config.get("schedule.hour", DEFAULT_SCHEDULE_HOUR),
-            'minute': config.get("schedule.minute", DEFAULT_SCHEDULE_MINUTE),
-            'timezone': config.get("schedule.timezone", DEFAULT_TIMEZONE)
-        }
+        """获取调度配置（小时、分钟统一转为整数，配置中写成字符串也可使用）"""
+        config = get_config()
+        try:
+            return {
+                'hour': int(config.get("schedule.hour", DEFAULT_SCHEDULE_HOUR)),
+                'minute': int(config.get("schedule.minute", DEFAULT_SCHEDULE_MINUTE)),
+                'timezone': str(config.get("schedule.timezone", DEFAULT_TIMEZONE))
+            }
+        except (TypeError, ValueError) as e:
+            raise SchedulerError(f"调度时间配置无效: {e}")
     
     def _setup_event_listeners(self) -> None:
         """设置事件监听器"""
-        def job_listener(event):
-            if event.exception:
-                logger.error(f"任务执行失败: {event.exception}")
-            else:
-                logger.info(f"任务执行成功: {event.job_id}")
-        
-        self.scheduler.add_listener(job_listener, EVENT_JOB_EXECUTED | EVENT_JOB_ERROR)
+        self.scheduler.add_listener(_job_listener, EVENT_JOB_EXECUTED | EVENT_JOB_ERROR)
     
     def _run_daily_update(self) -> None:
         """执行每日更新任务"""
@@ -130,17 +141,17 @@ class ReportScheduler:
                 logger.error("每日日报更新失败")
                 
         except Exception as e:
-            logger.error(f"执行每日更新任务时发生错误: {e}")
+            logger.error("执行每日更新任务时发生错误: %s", e)
             raise
     
     def _perform_health_check(self) -> Dict[str, bool]:
         """执行健康检查"""
         try:
             health_status = self.updater.health_check()
-            logger.info(f"健康检查结果: {health_status}")
+            logger.info("健康检查结果: %s", health_status)
             return health_status
         except Exception as e:
-            logger.error(f"健康检查失败: {e}")
+            logger.error("健康检查失败: %s", e)
             return {"gitlab_connection": False, "deepseek_api_key": False, "config_loaded": False}
     
     def _execute_daily_update(self) -> bool:
@@ -149,10 +160,10 @@ class ReportScheduler:
             today = datetime.now()
             return self.updater.update_daily_report(self.excel_path, today)
         except ReportUpdaterError as e:
-            logger.error(f"日报更新失败: {e}")
+            logger.error("日报更新失败: %s", e)
             return False
         except Exception as e:
-            logger.error(f"日报更新时发生未知错误: {e}")
+            logger.error("日报更新时发生未知错误: %s", e)
             return False
     
     def start(self) -> None:
@@ -163,14 +174,17 @@ class ReportScheduler:
         
         logger.info("启动日报调度器")
         
-        # 启动前执行一次健康检查
-        health_status = self._perform_health_check()
-        logger.info(f"启动时健康检查: {health_status}")
+        # 启动时的健康检查需要访问网络，放到后台线程执行，不推迟调度器启动
+        threading.Thread(
+            target=self._log_startup_health_check,
+            name="startup-health-check",
+            daemon=True
+        ).start()
         
         # 显示下次执行时间
         next_run = self.get_next_run_time()
         if next_run:
-            logger.info(f"下次执行时间: {next_run}")
+            logger.info("下次执行时间: %s", next_run)
         else:
             logger.warning("未设置调度任务或调度功能已禁用")
         
@@ -181,10 +195,15 @@ class ReportScheduler:
             logger.info("收到键盘中断信号")
             self.shutdown()
         except Exception as e:
-            logger.error(f"启动调度器失败: {e}")
+            logger.error("启动调度器失败: %s", e)
             self.is_running = False
             raise SchedulerError(f"启动调度器失败: {e}")
     
+    def _log_startup_health_check(self) -> None:
+        """启动时执行一次健康检查并记录结果"""
+        health_status = self._perform_health_check()
+        logger.info("启动时健康检查: %s", health_status)
+    
     def shutdown(self) -> None:
         """关闭调度器"""
         if not self.is_running:
@@ -198,32 +217,44 @@ class ReportScheduler:
             self.is_running = False
             logger.info("调度器已关闭")
         except Exception as e:
-            logger.error(f"关闭调度器时发生错误: {e}")
+            logger.error("关闭调度器时发生错误: %s", e)
     
     def run_once(self, date_obj: Optional[datetime] = None) -> bool:
         """手动执行一次更新"""
         if date_obj is None:
             date_obj = datetime.now()
         
-        logger.info(f"手动执行日报更新: {date_obj.strftime('%Y-%m-%d')}")
+        logger.info("手动执行日报更新: %s", date_obj.date().isoformat())
         
         try:
             return self.updater.update_daily_report(self.excel_path, date_obj)
         except ReportUpdaterError as e:
-            logger.error(f"手动执行日报更新失败: {e}")
+            logger.error("手动执行日报更新失败: %s", e)
             return False
         except Exception as e:
-            logger.error(f"手动执行日报更新时发生未知错误: {e}")
+            logger.error("手动执行日报更新时发生未知错误: %s", e)
             return False
     
     def get_next_run_time(self) -> Optional[datetime]:
         """获取下次执行时间"""
         jobs = self.scheduler.get_jobs()
         if jobs:
-            job = jobs[0]
-            return getattr(job, 'next_run_time', None)
+            return self._get_job_next_run_time(jobs[0])
         return None
     
+    @staticmethod
+    def _get_job_next_run_time(job) -> Optional[datetime]:
+        """获取任务的下次执行时间
+
+        调度器启动前任务处于 pending 状态，APScheduler 尚未为其计算 next_run_time，
+        此时直接由触发器推算，保证守护进程启动前也能显示下次执行时间。
+        """
+        next_run_time = getattr(job, 'next_run_time', None)
+        if next_run_time is None and job.pending:
+            trigger = job.trigger
+            next_run_time = trigger.get_next_fire_time(None, datetime.now(trigger.timezone))
+        return next_run_time
+    
     def get_job_status(self) -> Dict[str, Any]:
         """获取任务状态"""
         jobs = self.scheduler.get_jobs()
@@ -232,7 +263,7 @@ class ReportScheduler:
             return {"status": "no_jobs", "message": "未设置任务"}
         
         job = jobs[0]
-        next_run_time = getattr(job, 'next_run_time', None)
+        next_run_time = self._get_job_next_run_time(job)
         
         return {
             "status": "scheduled" if self.is_running else "not_started",
@@ -250,7 +281,7 @@ class ReportScheduler:
             logger.info("任务已暂停")
             return True
         except Exception as e:
-            logger.error(f"暂停任务失败: {e}")
+            logger.error("暂停任务失败: %s", e)
             return False
     
     def resume_job(self) -> bool:
@@ -260,7 +291,7 @@ class ReportScheduler:
             logger.info("任务已恢复")
             return True
         except Exception as e:
-            logger.error(f"恢复任务失败: {e}")
+            logger.error("恢复任务失败: %s", e)
             return False
 
 def main():
@@ -296,15 +327,15 @@ def main():
             scheduler.start()
             
     except SchedulerError as e:
-        logger.error(f"调度器错误: {e}")
+        logger.error("调度器错误: %s", e)
         print(f"❌ 调度器错误: {e}")
         exit(1)
     except ConfigurationError as e:
-        logger.error(f"配置错误: {e}")
+        logger.error("配置错误: %s", e)
         print(f"❌ 配置错误: {e}")
         exit(1)
     except Exception as e:
-        logger.error(f"程序执行失败: {e}")
+        logger.error("程序执行失败: %s", e)
         print(f"❌ 程序执行失败: {e}")
         exit(1)
 
@@ -1,19 +1,22 @@
-import argparse
+import heapq
 import os
 import shutil
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from functools import cached_property, lru_cache
+from itertools import chain
 from pathlib import Path
-from typing import Optional, List, Dict, Any
+from typing import TYPE_CHECKING, Optional, List, Dict, Any, Tuple
 
-from openai import OpenAI
-from openpyxl import load_workbook
-from openpyxl.utils.exceptions import InvalidFileException
-from openpyxl.styles import Alignment
-
-from config_manager import config, ConfigurationError
+from config_manager import get_config, ConfigurationError
+from excel_utils import save_workbook_atomically
 from gitlab_client import GitLabClient, GitLabClientError
 
+if TYPE_CHECKING:
+    from openai import OpenAI
+    from openpyxl.styles import Alignment
+
 logger = logging.getLogger(__name__)
 
 # 常量定义
@@ -22,6 +25,29 @@ DEFAULT_SUMMARY_FALLBACK = "无提交"
 MAX_COMMIT_DISPLAY = 10
 DEEPSEEK_BASE_URL = "https://api.deepseek.com"  # Deepseek API 基础地址
 EXCEL_START_ROW = 3
+EXCEL_SUFFIX = ".xlsx"
+MAX_PROJECT_WORKERS = 8  # 同时访问多个 GitLab 项目时的最大线程数（兼顾 GitLab 的请求频率限制）
+DEFAULT_DEEPSEEK_MODEL = "deepseek-chat"
+DEFAULT_DEEPSEEK_TEMPERATURE = 0.4
+DEFAULT_DEEPSEEK_MAX_TOKENS = 300
+DEFAULT_MAX_BACKUPS = 5
+SUMMARY_CACHE_SIZE = 32  # 每个更新器实例最多缓存的 AI 摘要数量
+DEFAULT_SYSTEM_PROMPT = "你是一名中国程序员，擅长写精炼的技术日报。请将提交信息总结为最多2句话，每句话不超过30字。"
+SUMMARY_PROMPT_HEADER = (
+    "以下是今天的 Git 提交信息，请提炼为精简的日报条目。要求：\n"
+    "1. 智能合并相关工作（如：多个修复合并为一条，同一模块的改动合并）\n"
+    "2. 提炼为少量核心工作条目（通常3-5条），避免罗列细节\n"
+    "3. 格式：1. XXX 2. XXX 3. XXX\n"
+    "4. 每条简洁明了，突出关键成果\n\n"
+    "Git 提交记录：\n"
+)
+
+@lru_cache(maxsize=1)
+def _get_wrap_alignment() -> "Alignment":
+    """日报内容单元格使用的自动换行样式（样式对象不可变，创建一次后复用；openpyxl 在首次写入时才导入）"""
+    from openpyxl.styles import Alignment
+    return Alignment(wrap_text=True)
+
 
 class ReportUpdaterError(Exception):
     """报告更新器异常"""
@@ -43,6 +69,7 @@ class ReportUpdater:
     """日报更新器，负责整个日报更新流程"""
     
     def __init__(self):
+        config = get_config()
         self.projects = config.get("gitlab.projects", [])
         self.default_branch = config.get("gitlab.default_branch", "master")
         self.gitlab_client = None  # 在单项目模式下使用
@@ -52,21 +79,44 @@ class ReportUpdater:
 
         self.deepseek_api_key = config.get_env_or_config("DEEPSEEK_API_KEY", "deepseek.api_key")
         
-        if self.deepseek_api_key:
-            self.openai_client = OpenAI(api_key=self.deepseek_api_key, base_url=DEEPSEEK_BASE_URL)
-        else:
-            self.openai_client = None
+        # Deepseek 请求参数与系统提示词在初始化时读取一次，每次生成摘要直接复用
+        deepseek_config = config.get("deepseek_config", {}) or {}
+        self.deepseek_model = deepseek_config.get("model", DEFAULT_DEEPSEEK_MODEL)
+        self.deepseek_temperature = deepseek_config.get("temperature", DEFAULT_DEEPSEEK_TEMPERATURE)
+        self.deepseek_max_tokens = deepseek_config.get("max_tokens", DEFAULT_DEEPSEEK_MAX_TOKENS)
+        self._system_message = {
+            "role": "system",
+            "content": deepseek_config.get("system_prompt", DEFAULT_SYSTEM_PROMPT)
+        }
+        # 备份配置同样只读取一次
+        self.backup_enabled = config.get("backup.enabled", True)
+        self.max_backups = config.get("backup.max_backups", DEFAULT_MAX_BACKUPS)
+        
+        # 本进程内已生成的 AI 摘要（按提交列表缓存），相同提交重复生成时不再请求 API
+        self._summary_cache: Dict[Tuple[str, ...], str] = {}
         
         # 从配置中获取 Excel 列配置
         self.date_column = config.get("excel_columns.date", 6)
         self.content_column = config.get("excel_columns.content", 7)
         self.hours_column = config.get("excel_columns.hours", 8)
         
-        logger.info(f"报告更新器初始化完成 - Excel列配置: 日期={self.date_column}, 内容={self.content_column}, 工时={self.hours_column}")
+        logger.info("报告更新器初始化完成 - Excel列配置: 日期=%s, 内容=%s, 工时=%s", self.date_column, self.content_column, self.hours_column)
+    
+    @cached_property
+    def openai_client(self) -> Optional["OpenAI"]:
+        """DeepSeek（OpenAI 兼容）客户端，首次生成摘要时才创建
+
+        openai 包导入耗时较长，健康检查、文本模式等不调用 AI 的流程无需加载。
+        """
+        if not self.deepseek_api_key:
+            return None
+        
+        from openai import OpenAI
+        return OpenAI(api_key=self.deepseek_api_key, base_url=DEEPSEEK_BASE_URL)
     
     def update_daily_report(self, xlsx_path: str, date_obj: datetime, work_hours: int = DEFAULT_WORK_HOURS) -> bool:
         """更新日报的主流程"""
-        logger.info(f"开始更新日报: {xlsx_path}, 日期: {date_obj.strftime('%Y-%m-%d')}")
+        logger.info("开始更新日报: %s, 日期: %s", xlsx_path, date_obj.date().isoformat())
         
         try:
             # 1. 验证文件存在
@@ -88,21 +138,24 @@ class ReportUpdater:
             return True
             
         except Exception as e:
-            logger.error(f"更新日报失败: {e}")
+            logger.error("更新日报失败: %s", e)
             return False
     
     def _validate_excel_file(self, xlsx_path: str) -> None:
         """验证Excel文件"""
-        if not os.path.exists(xlsx_path):
-            raise ReportUpdaterError(f"Excel 文件不存在: {xlsx_path}")
-        
-        if not xlsx_path.lower().endswith('.xlsx'):
+        # 只对扩展名部分转小写，不复制整个路径
+        if xlsx_path[-len(EXCEL_SUFFIX):].lower() != EXCEL_SUFFIX:
+            if not os.path.exists(xlsx_path):
+                raise ReportUpdaterError(f"Excel 文件不存在: {xlsx_path}")
             raise ReportUpdaterError(f"文件格式不正确，需要 .xlsx 文件: {xlsx_path}")
         
-        # 检查文件是否可读
+        # 打开一次即可同时确认文件存在且可读；Windows 下被 Excel 独占时打开就会失败，
+        # 在备份和请求 GitLab/AI 之前尽早报错（os.access 检查不出这种占用），无需实际读取数据
         try:
-            with open(xlsx_path, 'rb') as f:
-                f.read(1)
+            with open(xlsx_path, 'rb'):
+                pass
+        except FileNotFoundError:
+            raise ReportUpdaterError(f"Excel 文件不存在: {xlsx_path}")
         except PermissionError:
             raise ReportUpdaterError(f"Excel 文件被占用或无权限访问: {xlsx_path}")
     
@@ -112,20 +165,25 @@ class ReportUpdater:
             raise BackupError("创建备份失败")
     
     def _fetch_all_commits(self, date_obj: datetime) -> Dict[str, List[str]]:
-        """获取所有项目的提交信息"""
+        """获取所有项目的提交信息
+
+        使用 REST 的 repository/commits 接口按项目获取：GitLab GraphQL 的 repository
+        没有按时间区间（since/until）列出提交的字段，无法合并成单次 GraphQL 查询。
+        """
         all_commits = {}
 
         if self.projects:
-            # 多项目模式
-            for project in self.projects:
-                project_id = project.get("id")
-                branch = project.get("branch", self.default_branch)
-                client = GitLabClient(project_id=str(project_id), branch=branch)
-                
-                logger.info(f"正在获取项目 {project_id} (分支: {branch}) 的提交")
-                commits = self._fetch_commits_safely(client, date_obj)
-                if commits:
-                    all_commits[str(project_id)] = commits
+            # 多项目模式：各项目的请求互不依赖，并发获取，总耗时取决于最慢的项目
+            clients = self._get_gitlab_clients()
+            for client in clients:
+                logger.info("正在获取项目 %s (分支: %s) 的提交", client.project_id, client.default_branch)
+            
+            with ThreadPoolExecutor(max_workers=min(MAX_PROJECT_WORKERS, len(clients))) as executor:
+                results = executor.map(lambda client: self._fetch_commits_safely(client, date_obj), clients)
+                # executor.map 按提交顺序返回结果，合并后的项目顺序与配置一致
+                for client, commits in zip(clients, results):
+                    if commits:
+                        all_commits[str(client.project_id)] = commits
         else:
             # 单项目模式
             logger.info("单项目模式，获取提交")
@@ -140,10 +198,10 @@ class ReportUpdater:
         """安全地获取单个项目的提交信息"""
         try:
             commits = client.fetch_commits(date_obj)
-            logger.info(f"项目 {client.project_id}: 获取到 {len(commits)} 条提交信息")
+            logger.info("项目 %s: 获取到 %d 条提交信息", client.project_id, len(commits))
             return commits
         except GitLabClientError as e:
-            logger.warning(f"项目 {client.project_id}: 获取提交信息失败: {e}")
+            logger.warning("项目 %s: 获取提交信息失败: %s", client.project_id, e)
             return []
 
     def _fetch_commits_range_safely(
@@ -162,7 +220,7 @@ class ReportUpdater:
             )
             return commits
         except GitLabClientError as e:
-            logger.warning(f"项目 {client.project_id}: 获取提交信息失败: {e}")
+            logger.warning("项目 %s: 获取提交信息失败: %s", client.project_id, e)
             return []
 
     def summarize_project_range(
@@ -203,21 +261,25 @@ class ReportUpdater:
         return self.default_branch
     
     def _generate_summary_with_fallback(self, all_commits: Dict[str, List[str]]) -> str:
-        """生成摘要，带降级处理"""
-        if not all_commits:
+        """生成摘要，带降级处理
+
+        各项目的提交在这里合并一次（避免重复编号），AI 摘要和降级的简单摘要都使用同一个列表。
+        """
+        merged_commits = list(chain.from_iterable(all_commits.values()))
+        if not merged_commits:
             return DEFAULT_SUMMARY_FALLBACK
 
         try:
-            summary = self._generate_summary(all_commits)
+            summary = self._generate_summary(merged_commits, len(all_commits))
             if not summary:
                 logger.warning("AI生成摘要为空，使用简单摘要")
-                summary = self._create_simple_summary_for_all(all_commits)
+                summary = self._create_simple_summary(merged_commits)
             
-            logger.info(f"生成日报摘要:\n{summary}")
+            logger.info("生成日报摘要:\n%s", summary)
             return summary
         except Exception as e:
-            logger.error(f"生成摘要失败: {e}，将使用简单摘要")
-            return self._create_simple_summary_for_all(all_commits)
+            logger.error("生成摘要失败: %s，将使用简单摘要", e)
+            return self._create_simple_summary(merged_commits)
 
     def _write_to_excel_safely(self, xlsx_path: str, date_obj: datetime, summary: str, work_hours: int) -> None:
         """安全地写入Excel"""
@@ -226,22 +288,28 @@ class ReportUpdater:
     
     def _create_backup(self, xlsx_path: str) -> bool:
         """创建文件备份"""
-        if not config.get("backup.enabled", True):
+        if not self.backup_enabled:
             logger.debug("备份功能已禁用")
             return True
         
         try:
-            backup_dir = Path(xlsx_path).parent / "backups"
+            # 路径只解析一次，目录和文件名都从同一个 Path 取
+            source_path = Path(xlsx_path)
+            backup_dir = source_path.parent / "backups"
             backup_dir.mkdir(exist_ok=True)
             
+            if self._has_current_backup(source_path, backup_dir):
+                logger.info("文件自上次备份后未修改，跳过备份")
+                return True
+            
             # 生成备份文件名
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            backup_filename = f"{Path(xlsx_path).stem}_{timestamp}.xlsx"
+            backup_filename = f"{source_path.stem}_{timestamp}.xlsx"
             backup_path = backup_dir / backup_filename
             
             # 复制文件
             shutil.copy2(xlsx_path, backup_path)
-            logger.info(f"创建备份文件: {backup_path}")
+            logger.info("创建备份文件: %s", backup_path)
             
             # 清理旧备份
             self._cleanup_old_backups(backup_dir)
@@ -249,48 +317,59 @@ class ReportUpdater:
             return True
             
         except Exception as e:
-            logger.error(f"创建备份失败: {e}")
+            logger.error("创建备份失败: %s", e)
             return False
     
+    def _has_current_backup(self, source_path: Path, backup_dir: Path) -> bool:
+        """最新的备份是否与当前文件相同
+
+        copy2 会保留修改时间，最新备份的大小和修改时间（纳秒）都与原文件一致时，说明文件自备份后没有写入过，
+        只需比较 stat 结果，不必读取文件内容计算哈希。
+        """
+        source = source_path.stat()
+        prefix = f"{source_path.stem}_"
+        latest = None
+        with os.scandir(backup_dir) as entries:
+            for entry in entries:
+                if entry.name.startswith(prefix) and entry.name.endswith(EXCEL_SUFFIX) and entry.is_file():
+                    entry_stat = entry.stat()
+                    if latest is None or entry_stat.st_mtime_ns > latest.st_mtime_ns:
+                        latest = entry_stat
+        return (
+            latest is not None
+            and latest.st_size == source.st_size
+            and latest.st_mtime_ns == source.st_mtime_ns
+        )
+    
     def _cleanup_old_backups(self, backup_dir: Path) -> None:
         """清理旧的备份文件"""
         try:
-            max_backups = config.get("backup.max_backups", 5)
-            backup_files = sorted(
-                backup_dir.glob("*.xlsx"), 
-                key=lambda x: x.stat().st_mtime, 
-                reverse=True
-            )
+            max_backups = self.max_backups
+            # 一次 scandir 得到各备份的修改时间；只需保留最新的 max_backups 个，用 nlargest 做部分排序
+            with os.scandir(backup_dir) as entries:
+                backup_files = [
+                    (entry.stat().st_mtime, entry.path)
+                    for entry in entries
+                    if entry.name.endswith(EXCEL_SUFFIX) and entry.is_file()
+                ]
+            
+            if len(backup_files) <= max_backups:
+                return
             
-            for backup_file in backup_files[max_backups:]:
-                backup_file.unlink()
-                logger.debug(f"删除旧备份文件: {backup_file}")
+            kept_files = {path for _, path in heapq.nlargest(max_backups, backup_files)}
+            for _, backup_file in backup_files:
+                if backup_file not in kept_files:
+                    os.unlink(backup_file)
+                    logger.debug("删除旧备份文件: %s", backup_file)
                 
         except Exception as e:
-            logger.warning(f"清理旧备份时出错: {e}")
+            logger.warning("清理旧备份时出错: %s", e)
     
-    def _generate_summary(self, all_commits: Dict[str, List[str]]) -> str:
-        """生成日报摘要"""
-        if not all_commits:
-            return DEFAULT_SUMMARY_FALLBACK
-
-        if len(all_commits) == 1:
-            # 单项目，逻辑不变
-            project_id, commits = next(iter(all_commits.items()))
-            return self._generate_single_project_summary(commits)
-
-        # 多项目，将所有提交合并后生成统一摘要
-        all_commits_merged = []
-        for project_id, commits in all_commits.items():
-            if commits:
-                all_commits_merged.extend(commits)
-
-        if not all_commits_merged:
-            return DEFAULT_SUMMARY_FALLBACK
-
-        # 对合并后的提交生成统一摘要
-        logger.info(f"为 {len(all_commits)} 个项目的合并提交生成摘要")
-        return self._generate_single_project_summary(all_commits_merged)
+    def _generate_summary(self, commits: List[str], project_count: int = 1) -> str:
+        """为（已合并的）提交生成日报摘要"""
+        if project_count > 1:
+            logger.info("为 %d 个项目的合并提交生成摘要", project_count)
+        return self._generate_single_project_summary(commits)
 
     def _generate_single_project_summary(self, commits: List[str]) -> str:
         """为单个项目生成摘要"""
@@ -302,148 +381,150 @@ class ReportUpdater:
             logger.info("使用 Deepseek API 生成摘要")
             return self._call_deepseek_api(commits)
         except AIServiceError as e:
-            logger.error(f"调用 Deepseek API 失败: {e}")
+            logger.error("调用 Deepseek API 失败: %s", e)
             return self._create_simple_summary(commits)
     
-    def _create_simple_summary_for_all(self, all_commits: Dict[str, List[str]]) -> str:
-        """为所有项目创建简单的摘要"""
-        if not all_commits:
-            return DEFAULT_SUMMARY_FALLBACK
-
-        # 将所有项目的提交合并，避免重复编号
-        all_commits_merged = []
-        for project_id, commits in all_commits.items():
-            if commits:
-                all_commits_merged.extend(commits)
-        
-        if not all_commits_merged:
-            return DEFAULT_SUMMARY_FALLBACK
-            
-        return self._create_simple_summary(all_commits_merged)
-
     def _create_simple_summary(self, commits: List[str]) -> str:
         """创建简单的摘要"""
         if not commits:
             return "无提交记录"
         
         # 生成条目式摘要
-        summary_items = []
-        for i, commit in enumerate(commits[:MAX_COMMIT_DISPLAY], 1):
-            summary_items.append(f"{i}. {commit}")
+        summary = "\n".join(f"{i}. {commit}" for i, commit in enumerate(commits[:MAX_COMMIT_DISPLAY], 1))
         
-        if len(commits) > MAX_COMMIT_DISPLAY:
-            remaining_count = len(commits) - MAX_COMMIT_DISPLAY
-            summary_items.append(f"{MAX_COMMIT_DISPLAY + 1}. 以及其他{remaining_count}项提交")
+        remaining_count = len(commits) - MAX_COMMIT_DISPLAY
+        if remaining_count > 0:
+            summary += f"\n{MAX_COMMIT_DISPLAY + 1}. 以及其他{remaining_count}项提交"
         
-        return "\n".join(summary_items)
+        return summary
     
     def _call_deepseek_api(self, commits: List[str]) -> str:
-        """调用 Deepseek API 生成摘要"""
+        """调用 Deepseek API 生成摘要
+
+        提示词中固定的系统提示词和说明在前、提交列表在后，便于服务端复用相同前缀的缓存；
+        同一进程内提交列表完全相同时直接返回上次的摘要。
+        """
+        cache_key = tuple(commits)
+        cached_summary = self._summary_cache.get(cache_key)
+        if cached_summary is not None:
+            logger.info("提交列表与之前相同，复用已生成的摘要")
+            return cached_summary
+        
         logger.info("调用 Deepseek API 生成摘要")
         
         prompt = self._create_prompt(commits)
         messages = self._create_api_messages(prompt)
         
         try:
-            deepseek_config = config.get("deepseek_config", {})
             response = self.openai_client.chat.completions.create(
-                model=deepseek_config.get("model", "deepseek-chat"),
+                model=self.deepseek_model,
                 messages=messages,
                 stream=False,
-                temperature=deepseek_config.get("temperature", 0.4),
-                max_tokens=deepseek_config.get("max_tokens", 300)
+                temperature=self.deepseek_temperature,
+                max_tokens=self.deepseek_max_tokens
             )
             summary = response.choices[0].message.content.strip()
             logger.info("Deepseek API 调用成功")
-            return summary
-            
         except Exception as e:
             raise AIServiceError(f"API 请求失败: {e}")
+        
+        if summary:
+            if len(self._summary_cache) >= SUMMARY_CACHE_SIZE:
+                # 字典保持插入顺序，淘汰最早缓存的摘要
+                self._summary_cache.pop(next(iter(self._summary_cache)))
+            self._summary_cache[cache_key] = summary
+        return summary
     
     def _create_prompt(self, commits: List[str]) -> str:
         """创建API提示词"""
-        return (
-            "以下是今天的 Git 提交信息，请提炼为精简的日报条目。要求：\n"
-            "1. 智能合并相关工作（如：多个修复合并为一条，同一模块的改动合并）\n"
-            "2. 提炼为少量核心工作条目（通常3-5条），避免罗列细节\n"
-            "3. 格式：1. XXX 2. XXX 3. XXX\n"
-            "4. 每条简洁明了，突出关键成果\n\n"
-            "Git 提交记录：\n"
-            + "\n".join(f"- {commit}" for commit in commits)
-        )
+        if not commits:
+            return SUMMARY_PROMPT_HEADER
+        return SUMMARY_PROMPT_HEADER + "- " + "\n- ".join(commits)
     
     def _create_api_messages(self, prompt: str) -> List[Dict[str, str]]:
         """创建API请求消息"""
-        deepseek_config = config.get("deepseek_config", {})
-        
-        return [
-            {
-                "role": "system", 
-                "content": deepseek_config.get(
-                    "system_prompt", 
-                    "你是一名中国程序员，擅长写精炼的技术日报。请将提交信息总结为最多2句话，每句话不超过30字。"
-                )
-            },
-            {"role": "user", "content": prompt}
-        ]
+        return [self._system_message, {"role": "user", "content": prompt}]
     
     def _write_to_excel(self, xlsx_path: str, date_obj: datetime, summary: str, work_hours: int) -> bool:
         """写入 Excel 文件"""
+        from openpyxl import load_workbook
+        from openpyxl.utils.exceptions import InvalidFileException
+        
         try:
-            logger.info(f"打开 Excel 文件: {xlsx_path}")
+            logger.info("打开 Excel 文件: %s", xlsx_path)
             
             # 修复：openpyxl 不支持上下文管理器
+            # 需要写回原文件：保留外部链接（keep_links 默认 True），也不能使用 data_only，否则公式会被缓存值覆盖；
+            # keep_vba、rich_text 默认已关闭
             workbook = load_workbook(xlsx_path)
             worksheet = workbook.active
             
             # 格式化目标日期
             target_date = self._format_target_date(date_obj)
-            logger.info(f"查找日期行: {target_date}")
+            logger.info("查找日期行: %s", target_date)
             
             # 查找对应的日期行
             row_found = self._find_and_update_row(worksheet, target_date, summary, work_hours)
             
             if row_found:
-                # 保存文件
-                workbook.save(xlsx_path)
-                logger.info(f"成功写入日期 {target_date} 的日报")
+                # 保存文件：先写临时文件再替换，保存失败时月报保持原样
+                save_workbook_atomically(workbook, xlsx_path)
+                logger.info("成功写入日期 %s 的日报", target_date)
                 return True
             else:
-                logger.warning(f"未找到日期 {target_date} 对应的行")
+                logger.warning("未找到日期 %s 对应的行", target_date)
                 return False
             
         except InvalidFileException as e:
-            logger.error(f"Excel 文件格式错误: {e}")
+            logger.error("Excel 文件格式错误: %s", e)
             return False
         except PermissionError as e:
-            logger.error(f"Excel 文件被占用或无权限: {e}")
+            logger.error("Excel 文件被占用或无权限: %s", e)
             return False
         except Exception as e:
-            logger.error(f"写入 Excel 文件时发生错误: {e}")
+            logger.error("写入 Excel 文件时发生错误: %s", e)
             return False
     
     def _format_target_date(self, date_obj: datetime) -> str:
-        """格式化目标日期"""
-        return date_obj.strftime("%Y/%-m/%-d")
+        """格式化目标日期（如 2025/1/5）
+
+        直接拼接年月日：比 strftime 少一次格式串解析，且 %-m/%-d 只有 glibc 支持，Windows 下会报错。
+        """
+        return f"{date_obj.year}/{date_obj.month}/{date_obj.day}"
     
     def _find_and_update_row(self, worksheet, target_date: str, summary: str, work_hours: int) -> bool:
         """查找并更新对应的行"""
-        for row in range(EXCEL_START_ROW, worksheet.max_row + 1):
-            cell_value = worksheet.cell(row, self.date_column).value
+        # 只遍历日期列且直接取值，避免逐个 worksheet.cell() 查找单元格
+        date_values = worksheet.iter_rows(
+            min_row=EXCEL_START_ROW,
+            min_col=self.date_column,
+            max_col=self.date_column,
+            values_only=True
+        )
+        for row, (cell_value,) in enumerate(date_values, EXCEL_START_ROW):
+            if not cell_value:
+                continue
+            # 日期列通常是 "2025/1/5" 这样的文本；若单元格是 Excel 日期（读取为 datetime），按相同格式拼出年月日比较
+            if isinstance(cell_value, datetime):
+                cell_date = self._format_target_date(cell_value)
+            else:
+                cell_date = str(cell_value).strip()
+            if cell_date != target_date:
+                continue
             
-            if cell_value and str(cell_value).strip() == target_date:
-                logger.info(f"找到日期行: 第 {row} 行")
-                
-                # 写入工作内容并设置自动换行
-                content_cell = worksheet.cell(row=row, column=self.content_column)
-                content_cell.value = summary
-                content_cell.alignment = Alignment(wrap_text=True)
-                
-                # 如果工时列为空，填入默认工时
-                if not worksheet.cell(row, self.hours_column).value:
-                    worksheet.cell(row, self.hours_column, work_hours)
-                
-                return True
+            logger.info("找到日期行: 第 %d 行", row)
+            
+            # 写入工作内容并设置自动换行
+            content_cell = worksheet.cell(row=row, column=self.content_column)
+            content_cell.value = summary
+            content_cell.alignment = _get_wrap_alignment()
+            
+            # 如果工时列为空，填入默认工时（读取和写入共用同一个单元格对象）
+            hours_cell = worksheet.cell(row=row, column=self.hours_column)
+            if not hours_cell.value:
+                hours_cell.value = work_hours
+            
+            return True
         
         return False
     
@@ -457,22 +538,55 @@ class ReportUpdater:
             "config_loaded": True
         }
         
-        # 检查 GitLab 连接
+        # 检查 GitLab 连接：多项目模式下逐个项目验证，各项目的请求并发发出，耗时取决于最慢的一个；
+        # 网络请求进行期间在当前线程完成本地的配置检查
+        executor = None
+        futures = []
         try:
-            status["gitlab_connection"] = self.gitlab_client.validate_connection()
+            clients = self._get_gitlab_clients()
+            if clients:
+                executor = ThreadPoolExecutor(max_workers=min(MAX_PROJECT_WORKERS, len(clients)))
+                futures = [executor.submit(client.validate_connection) for client in clients]
         except Exception as e:
-            logger.error(f"GitLab 连接检查失败: {e}")
+            logger.error("GitLab 连接检查失败: %s", e)
         
         # 检查配置完整性
         try:
             self._validate_configuration()
         except ConfigurationError as e:
-            logger.error(f"配置检查失败: {e}")
+            logger.error("配置检查失败: %s", e)
             status["config_loaded"] = False
         
-        logger.info(f"健康检查完成: {status}")
+        if executor is not None:
+            try:
+                # 任一项目连接失败即可得出结论
+                status["gitlab_connection"] = all(future.result() for future in futures)
+            except Exception as e:
+                logger.error("GitLab 连接检查失败: %s", e)
+            finally:
+                # 尚未开始的检查直接取消（shutdown 的 cancel_futures 参数需要 Python 3.9+，这里逐个取消）
+                for future in futures:
+                    future.cancel()
+                executor.shutdown(wait=False)
+        
+        logger.info("健康检查完成: %s", status)
         return status
     
+    def _get_gitlab_clients(self) -> List[GitLabClient]:
+        """获取需要检查的 GitLab 客户端（多项目模式下每个项目一个）"""
+        if not self.projects:
+            return [self.gitlab_client] if self.gitlab_client else []
+        
+        return self._project_clients
+    
+    @cached_property
+    def _project_clients(self) -> List[GitLabClient]:
+        """多项目模式下各项目的客户端，首次使用时创建，之后的健康检查和每日获取都复用"""
+        return [
+            GitLabClient(project_id=str(project.get("id")), branch=project.get("branch", self.default_branch))
+            for project in self.projects
+        ]
+    
     def _validate_configuration(self) -> None:
         """验证配置完整性"""
         # 验证Excel列配置
@@ -482,11 +596,13 @@ class ReportUpdater:
         # 验证必要的配置项
         required_configs = ["excel_columns", "retry_config", "logging"]
         for config_key in required_configs:
-            if not config.get(config_key):
+            if not get_config().get(config_key):
                 raise ConfigurationError(f"缺少必要配置: {config_key}")
 
 def main():
     """主函数"""
+    import argparse
+    
     parser = argparse.ArgumentParser(description="日报更新器")
     parser.add_argument("--file", required=True, help="月报 Excel 文件路径")
     parser.add_argument("--date", help="日期 YYYY-MM-DD，默认今天")
@@ -519,7 +635,7 @@ def main():
             exit(1)
             
     except Exception as e:
-        logger.error(f"程序执行失败: {e}")
+        logger.error("程序执行失败: %s", e)
         print(f"❌ 程序执行失败: {e}")
         exit(1)
 
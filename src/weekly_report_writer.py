@@ -5,14 +5,32 @@
 """
 
 import logging
+import os
+import re
 import shutil
-from datetime import datetime
+from contextlib import closing
+from datetime import date, datetime
+from itertools import count
 from pathlib import Path
-from typing import List, Optional, Dict
+from typing import Any, Iterator, List, Optional, Dict, Set, Tuple
 from openpyxl import load_workbook
+from openpyxl.styles import Alignment
 from openpyxl.utils.exceptions import InvalidFileException
 
-from date_utils import get_week_start, get_week_dates, is_date_match, format_date_chinese, get_week_range_str
+from date_utils import (
+    get_week_start,
+    get_week_dates,
+    parse_date_flexible,
+    format_date_chinese,
+    get_week_range_str,
+)
+from excel_utils import save_workbook_atomically
+
+# 可选：安装 python-calamine 后读取月报使用 Rust 实现的解析器，未安装时使用 openpyxl 只读模式
+try:
+    from python_calamine import CalamineWorkbook
+except ImportError:
+    CalamineWorkbook = None
 
 logger = logging.getLogger(__name__)
 
@@ -24,6 +42,14 @@ MONTHLY_START_ROW = 3       # 月报数据起始行
 WEEKLY_CONTENT_COLUMN = 2   # 周报中的事项列（B列）
 WEEKLY_START_ROW = 3        # 周报数据起始行（序号1对应第3行）
 
+WEEKDAY_NAMES = ("周一", "周二", "周三", "周四", "周五")  # 周报对应的工作日，下标与序号1-5对应
+
+# 周报内容单元格的样式：自动换行、顶端对齐（样式对象不可变，所有单元格共用一个）
+WEEKLY_CONTENT_ALIGNMENT = Alignment(wrap_text=True, vertical='top')
+
+# 模板中的周次占位文本：“第 n 周”“第n周”（如“第 n 周完成重点工作”）
+_WEEK_PLACEHOLDER_RE = re.compile(r"第 ?n ?周")
+
 # 周报模板相关配置
 DEFAULT_TEMPLATE_DIR = "data/weekly report template"  # 周报模板目录
 DEFAULT_DATA_DIR = "data"                             # 数据目录
@@ -46,23 +72,25 @@ def find_template_file(template_dir: str = DEFAULT_TEMPLATE_DIR) -> Optional[str
     """
     template_path = Path(template_dir)
 
-    if not template_path.exists():
-        logger.warning(f"模板目录不存在: {template_path}")
+    # 一次 scandir 遍历：遇到包含"周报"的 .xlsx 文件立即返回，否则返回第一个 .xlsx 文件
+    first_file = None
+    try:
+        with os.scandir(template_path) as entries:
+            for entry in entries:
+                if not entry.name.endswith(".xlsx") or not entry.is_file():
+                    continue
+                if "周报" in entry.name:
+                    logger.info("找到周报模板: %s", entry.path)
+                    return entry.path
+                if first_file is None:
+                    first_file = entry.path
+    except FileNotFoundError:
+        logger.warning("模板目录不存在: %s", template_path)
         return None
 
-    # 查找.xlsx文件
-    template_files = list(template_path.glob("*.xlsx"))
-
-    if template_files:
-        # 优先返回包含"周报"的文件
-        for file in template_files:
-            if "周报" in file.name:
-                logger.info(f"找到周报模板: {file}")
-                return str(file)
-
-        # 返回第一个找到的文件
-        logger.info(f"找到模板文件: {template_files[0]}")
-        return str(template_files[0])
+    if first_file is not None:
+        logger.info("找到模板文件: %s", first_file)
+        return first_file
 
     logger.warning("模板目录中未找到.xlsx文件")
     return None
@@ -89,6 +117,37 @@ def _extract_name_from_template(template_name: str) -> str:
     return parts[-1]
 
 
+def _get_template_week_number(week_start_date: Optional[datetime] = None) -> int:
+    """
+    计算周报模板使用的周次（ISO 周数减1），默认为本周
+    """
+    if week_start_date is None:
+        week_start_date = get_week_start()
+    return week_start_date.isocalendar()[1] - 1
+
+
+def _apply_weekly_title(worksheet, week_number: int) -> bool:
+    """
+    在已打开的工作表中将“第 n 周完成重点工作”占位文本替换为实际周次，返回是否有改动
+    """
+    week_title = f"第{week_number}周"
+
+    updated = False
+    for row in worksheet.iter_rows():
+        for cell in row:
+            value = cell.value
+            # 绝大多数单元格不含“周”字，先用 in 判断，跳过正则匹配
+            if not isinstance(value, str) or "周" not in value:
+                continue
+
+            new_value, replaced = _WEEK_PLACEHOLDER_RE.subn(week_title, value)
+            if replaced:
+                cell.value = new_value
+                updated = True
+
+    return updated
+
+
 def _update_weekly_title_text(file_path: str, week_number: int) -> None:
     """
     将模板中的“第 n 周完成重点工作”占位文本替换为实际周次
@@ -96,33 +155,9 @@ def _update_weekly_title_text(file_path: str, week_number: int) -> None:
     workbook = None
     try:
         workbook = load_workbook(file_path)
-        worksheet = workbook.active
-
-        replacements = [
-            ("第 n 周完成重点工作", f"第{week_number}周完成重点工作"),
-            ("第n周完成重点工作", f"第{week_number}周完成重点工作"),
-            ("第 n 周", f"第{week_number}周"),
-            ("第n周", f"第{week_number}周"),
-        ]
-
-        updated = False
-        for row in worksheet.iter_rows():
-            for cell in row:
-                value = cell.value
-                if not isinstance(value, str):
-                    continue
 
-                original_value = value
-                for old, new in replacements:
-                    if old in value:
-                        value = value.replace(old, new)
-
-                if value != original_value:
-                    cell.value = value
-                    updated = True
-
-        if updated:
-            workbook.save(file_path)
+        if _apply_weekly_title(workbook.active, week_number):
+            save_workbook_atomically(workbook, file_path)
 
     except Exception as e:
         raise WeeklyReportWriterError(f"更新周报标题失败: {e}")
@@ -131,7 +166,7 @@ def _update_weekly_title_text(file_path: str, week_number: int) -> None:
             workbook.close()
 
 
-def copy_template_to_data_dir(template_path: str, data_dir: str = DEFAULT_DATA_DIR, week_start_date: Optional[datetime] = None) -> Optional[str]:
+def copy_template_to_data_dir(template_path: str, data_dir: str = DEFAULT_DATA_DIR, week_start_date: Optional[datetime] = None, update_title: bool = True) -> Optional[str]:
     """
     将周报模板从模板目录复制到数据目录
 
@@ -139,6 +174,8 @@ def copy_template_to_data_dir(template_path: str, data_dir: str = DEFAULT_DATA_D
         template_path: 模板文件路径
         data_dir: 目标数据目录
         week_start_date: 周一日期，用于生成新文件名
+        update_title: 是否立即替换模板内的周次标题；调用方随后会打开文件写入时可传 False，
+            在同一次打开、保存中替换（见 _apply_weekly_title）
 
     Returns:
         复制后的文件路径，复制失败返回None
@@ -147,18 +184,11 @@ def copy_template_to_data_dir(template_path: str, data_dir: str = DEFAULT_DATA_D
         template_file = Path(template_path)
         data_path = Path(data_dir)
 
-        if not template_file.exists():
-            raise WeeklyReportWriterError(f"模板文件不存在: {template_path}")
-
         # 确保目标目录存在
         data_path.mkdir(parents=True, exist_ok=True)
 
-        # 生成新文件名
-        if week_start_date is None:
-            week_start_date = get_week_start()
-
-        # 计算周数（ISO标准），减1
-        week_number = week_start_date.isocalendar()[1] - 1
+        # 生成新文件名：计算周数（ISO标准），减1
+        week_number = _get_template_week_number(week_start_date)
 
         # 从模板文件名中提取姓名，兼容姓名在任意一侧的模板
         template_name = template_file.stem  # 不含扩展名
@@ -169,17 +199,22 @@ def copy_template_to_data_dir(template_path: str, data_dir: str = DEFAULT_DATA_D
         new_filename = f"第{week_number}周周报表-{name_part}.xlsx"
         target_path = data_path / new_filename
 
-        # 复制文件
-        shutil.copy2(template_file, target_path)
-        logger.info(f"复制周报模板成功: {template_file.name} -> {new_filename}")
+        # 复制文件：只复制内容，新生成的周报应使用当前时间作为修改时间，而不是沿用模板的时间和权限；
+        # 模板是否存在由复制本身判断，不再单独检查
+        try:
+            shutil.copyfile(template_file, target_path)
+        except FileNotFoundError as e:
+            raise WeeklyReportWriterError(f"模板文件不存在: {template_path}") from e
+        logger.info("复制周报模板成功: %s -> %s", template_file.name, new_filename)
 
         # 同步更新模板内部的周次标题
-        _update_weekly_title_text(str(target_path), week_number)
+        if update_title:
+            _update_weekly_title_text(str(target_path), week_number)
 
         return str(target_path)
 
     except Exception as e:
-        logger.error(f"复制周报模板失败: {e}")
+        logger.error("复制周报模板失败: %s", e)
         raise WeeklyReportWriterError(f"复制周报模板失败: {e}")
 
 
@@ -206,6 +241,10 @@ class WeeklyReportWriter:
         self.use_template = use_template
         self.template_dir = template_dir
         self.week_start_date = week_start_date
+        # 从模板复制后尚未替换的周次标题（None 表示无需替换）
+        self._pending_title_week_number: Optional[int] = None
+        # 最近一次扫描月报的结果：((本周日期, 修改时间, 文件大小), 日期 -> (行号, 内容))
+        self._week_rows_cache: Optional[Tuple[tuple, Dict[date, Tuple[int, Any]]]] = None
 
         # 验证月报文件存在
         if not self.monthly_report_path.exists():
@@ -220,9 +259,11 @@ class WeeklyReportWriter:
 
             # 复制模板到数据目录（weekly_report_path本身就是目录）
             target_data_dir = weekly_report_path if Path(weekly_report_path).is_dir() else str(Path(weekly_report_path).parent)
-            copied_path = copy_template_to_data_dir(template_file, data_dir=target_data_dir, week_start_date=week_start_date)
+            # 周次标题留到写入周报内容时一起替换，复制出的周报只需打开、保存一次
+            copied_path = copy_template_to_data_dir(template_file, data_dir=target_data_dir, week_start_date=week_start_date, update_title=False)
             if not copied_path:
                 raise WeeklyReportWriterError("复制周报模板失败")
+            self._pending_title_week_number = _get_template_week_number(week_start_date)
 
             self.weekly_report_path = Path(copied_path)
         else:
@@ -231,7 +272,7 @@ class WeeklyReportWriter:
             if not self.weekly_report_path.exists():
                 raise WeeklyReportWriterError(f"周报文件不存在: {weekly_report_path}")
 
-        logger.info(f"周报生成器初始化 - 月报: {self.monthly_report_path.name}, 周报: {self.weekly_report_path.name}")
+        logger.info("周报生成器初始化 - 月报: %s, 周报: %s", self.monthly_report_path.name, self.weekly_report_path.name)
 
     def generate_weekly_report(self, week_start_date: Optional[datetime] = None) -> bool:
         """
@@ -252,17 +293,19 @@ class WeeklyReportWriter:
                 week_start_date = get_week_start(week_start_date)
 
             week_range = get_week_range_str(week_start_date)
-            logger.info(f"开始生成周报 - 周期: {week_range}")
+            logger.info("开始生成周报 - 周期: %s", week_range)
 
             # 读取本周日报内容
             weekly_contents = self._read_weekly_reports(week_start_date)
 
             # 统计读取结果
             found_count = sum(1 for content in weekly_contents if content is not None)
-            logger.info(f"从月报中读取到 {found_count}/5 天的日报内容")
+            logger.info("从月报中读取到 %d/5 天的日报内容", found_count)
 
             if found_count == 0:
                 logger.warning("未找到任何日报内容，请检查月报文件")
+                # 从模板复制的周报没有内容可写，但周次标题仍要替换，不能留下“第n周”占位文本
+                self._write_to_weekly_report(weekly_contents)
                 return False
 
             # 写入周报
@@ -272,8 +315,22 @@ class WeeklyReportWriter:
             return True
 
         except Exception as e:
-            logger.error(f"❌ 生成周报失败: {e}", exc_info=True)
+            logger.error("❌ 生成周报失败: %s", e, exc_info=True)
             return False
+        finally:
+            # 读取月报或写入周报出错时，复制出的周报仍需替换周次标题
+            self._apply_pending_title()
+
+    def _apply_pending_title(self) -> None:
+        """若从模板复制的周报尚未替换周次标题，单独打开文件替换"""
+        if self._pending_title_week_number is None:
+            return
+
+        week_number, self._pending_title_week_number = self._pending_title_week_number, None
+        try:
+            _update_weekly_title_text(str(self.weekly_report_path), week_number)
+        except WeeklyReportWriterError as e:
+            logger.error("替换周报标题失败: %s", e)
 
     def _read_weekly_reports(self, monday: datetime) -> List[Optional[str]]:
         """
@@ -286,41 +343,35 @@ class WeeklyReportWriter:
             包含5个元素的列表，对应周一到周五的日报内容，未找到的为None
         """
         try:
-            workbook = load_workbook(self.monthly_report_path, data_only=True)
-            worksheet = workbook.active
-
             weekly_contents = []
-            weekday_names = ["周一", "周二", "周三", "周四", "周五"]
 
             # 获取本周一到周五的日期
             week_dates = get_week_dates(monday)
+            targets = {week_date.date() for week_date in week_dates}
+
+            # 本周日期 -> (行号, 内容) 的索引，之后每天的查找都是一次字典查询
+            week_rows = self._get_week_rows(targets)
 
             for i, target_date in enumerate(week_dates):
-                weekday_name = weekday_names[i]
                 date_str = format_date_chinese(target_date)
 
                 # 在月报中查找对应日期
                 content = None
-                for row_idx in range(MONTHLY_START_ROW, worksheet.max_row + 1):
-                    cell_date = worksheet.cell(row=row_idx, column=MONTHLY_DATE_COLUMN).value
-
-                    if is_date_match(cell_date, target_date):
-                        content = worksheet.cell(row=row_idx, column=MONTHLY_CONTENT_COLUMN).value
-
-                        if content:
-                            content = str(content).strip()  # 清理空白字符
-                            logger.info(f"  ✓ {date_str}: 找到日报内容 (月报第{row_idx}行)")
-                        else:
-                            logger.warning(f"  ⚠ {date_str}: 日报内容为空 (月报第{row_idx}行)")
-                            content = None
-                        break
+                found = week_rows.get(target_date.date())
+                if found is not None:
+                    row_idx, content = found
+                    if content:
+                        content = str(content).strip()  # 清理空白字符
+                        logger.info("  ✓ %s: 找到日报内容 (月报第%d行)", date_str, row_idx)
+                    else:
+                        logger.warning("  ⚠ %s: 日报内容为空 (月报第%d行)", date_str, row_idx)
+                        content = None
 
                 if content is None:
-                    logger.warning(f"  ✗ {date_str}: 未找到日报")
+                    logger.warning("  ✗ %s: 未找到日报", date_str)
 
                 weekly_contents.append(content)
 
-            workbook.close()
             return weekly_contents
 
         except InvalidFileException as e:
@@ -328,6 +379,86 @@ class WeeklyReportWriter:
         except Exception as e:
             raise WeeklyReportWriterError(f"读取月报文件失败: {e}")
 
+    def _get_week_rows(self, targets: Set[date]) -> Dict[date, Tuple[int, Any]]:
+        """
+        获取指定日期在月报中的 (行号, 内容)，月报文件未修改时复用上次为同一周扫描的结果
+
+        先预览再生成同一周的周报时，月报只需解析一次；以文件的修改时间和大小判断是否修改过。
+
+        Args:
+            targets: 本周一到周五的日期集合
+
+        Returns:
+            日期到 (行号, 内容) 的字典，月报中没有的日期不在其中
+        """
+        monthly_stat = self.monthly_report_path.stat()
+        cache_key = (frozenset(targets), monthly_stat.st_mtime_ns, monthly_stat.st_size)
+        if self._week_rows_cache is not None and self._week_rows_cache[0] == cache_key:
+            logger.debug("月报未修改，复用上次读取的结果")
+            return self._week_rows_cache[1]
+
+        # 一次遍历日期列和内容列（同一日期以第一次出现的行为准）
+        week_rows = {}
+        # 五天都找到后提前结束扫描；closing 保证提前退出时也立即关闭月报文件
+        with closing(self._iter_monthly_rows()) as monthly_rows:
+            for row_idx, (cell_date, content) in zip(count(MONTHLY_START_ROW), monthly_rows):
+                # Excel 日期直接取年月日；只有字符串才需要解析，空单元格和其他类型直接跳过
+                if isinstance(cell_date, datetime):
+                    day = cell_date.date()
+                elif isinstance(cell_date, date):
+                    day = cell_date
+                elif isinstance(cell_date, str) and cell_date:
+                    parsed = parse_date_flexible(cell_date)
+                    if parsed is None:
+                        continue
+                    day = parsed.date()
+                else:
+                    continue
+                if day in targets and day not in week_rows:
+                    week_rows[day] = (row_idx, content)
+                    if len(week_rows) == len(targets):
+                        break
+
+        self._week_rows_cache = (cache_key, week_rows)
+        return week_rows
+
+    def _iter_monthly_rows(self) -> Iterator[Tuple[Any, Any]]:
+        """
+        从数据起始行开始逐行产出月报的 (日期, 内容) 值
+
+        安装了 python-calamine 且月报只有一个工作表时使用 calamine（Rust 实现，解析速度远快于 openpyxl）；
+        否则使用 openpyxl 只读模式按行流式解析（多工作表时 calamine 无法得知哪个是活动工作表）。
+        """
+        if CalamineWorkbook is not None:
+            calamine_workbook = CalamineWorkbook.from_path(str(self.monthly_report_path))
+            if len(calamine_workbook.sheet_names) == 1:
+                # 不跳过开头的空白区域，使列表下标与 Excel 行号、列号一一对应
+                sheet_rows = calamine_workbook.get_sheet_by_index(0).to_python(skip_empty_area=False)
+                date_index, content_index = MONTHLY_DATE_COLUMN - 1, MONTHLY_CONTENT_COLUMN - 1
+                for values in sheet_rows[MONTHLY_START_ROW - 1:]:
+                    yield (
+                        values[date_index] if len(values) > date_index else None,
+                        values[content_index] if len(values) > content_index else None,
+                    )
+                return
+
+        # 只读取数据，使用只读模式按行流式解析；不会保存，外部链接也无需解析
+        workbook = load_workbook(self.monthly_report_path, read_only=True, data_only=True, keep_links=False)
+        try:
+            worksheet = workbook.active
+            # 只读模式按工作表记录的 dimension 决定读到第几行，部分工具生成的文件会错误地记为 A1:A1，
+            # 导致一行数据都读不到；清除后一直读到 XML 中的最后一行（不影响需要扫描的行数）
+            worksheet.reset_dimensions()
+            yield from worksheet.iter_rows(
+                min_row=MONTHLY_START_ROW,
+                min_col=MONTHLY_DATE_COLUMN,
+                max_col=MONTHLY_CONTENT_COLUMN,
+                values_only=True
+            )
+        finally:
+            # 只读模式会一直持有文件句柄，读取出错时也要关闭
+            workbook.close()
+
     def _write_to_weekly_report(self, contents: List[Optional[str]]) -> None:
         """
         将日报内容写入周报
@@ -335,12 +466,21 @@ class WeeklyReportWriter:
         Args:
             contents: 包含5个元素的列表，对应周一到周五的日报内容
         """
+        # 没有要写入的内容（也无需替换周次标题）时不打开周报文件
+        if not any(contents) and self._pending_title_week_number is None:
+            logger.info("没有需要写入周报的日报内容")
+            return
+
         try:
             workbook = load_workbook(self.weekly_report_path)
             worksheet = workbook.active
 
-            weekday_names = ["周一", "周二", "周三", "周四", "周五"]
             write_count = 0
+            changed = False
+
+            # 刚从模板复制的周报：在同一次打开中替换周次标题
+            if self._pending_title_week_number is not None:
+                changed = _apply_weekly_title(worksheet, self._pending_title_week_number)
 
             # 填写内容到对应序号（保持序号1-5对应周一到周五）
             for i, content in enumerate(contents):
@@ -348,25 +488,28 @@ class WeeklyReportWriter:
                 target_row = WEEKLY_START_ROW + i  # B3-B7行
 
                 if content:
-                    # 写入内容
+                    # 写入内容并设置自动换行（与日报保持一致）；内容和样式都已一致时不改动单元格
                     cell = worksheet.cell(row=target_row, column=WEEKLY_CONTENT_COLUMN)
-                    cell.value = content
+                    if cell.value != content or cell.alignment != WEEKLY_CONTENT_ALIGNMENT:
+                        cell.value = content
+                        cell.alignment = WEEKLY_CONTENT_ALIGNMENT
+                        changed = True
 
-                    # 设置自动换行（与日报保持一致）
-                    from openpyxl.styles import Alignment
-                    cell.alignment = Alignment(wrap_text=True, vertical='top')
-
-                    logger.info(f"  ✓ 序号{sequence_number}({weekday_names[i]}): 写入周报第{target_row}行")
+                    logger.info("  ✓ 序号%d(%s): 写入周报第%d行", sequence_number, WEEKDAY_NAMES[i], target_row)
                     write_count += 1
                 else:
                     # 保持该行为空（不覆盖已有内容）
-                    logger.debug(f"  - 序号{sequence_number}({weekday_names[i]}): 无内容，跳过")
+                    logger.debug("  - 序号%d(%s): 无内容，跳过", sequence_number, WEEKDAY_NAMES[i])
 
-            # 保存文件
-            workbook.save(self.weekly_report_path)
+            # 保存文件：重复生成同一周的周报且内容未变化时，跳过耗时的保存
+            if changed:
+                save_workbook_atomically(workbook, self.weekly_report_path)
+            else:
+                logger.info("周报内容与文件中已有内容一致，无需保存")
+            self._pending_title_week_number = None
             workbook.close()
 
-            logger.info(f"成功写入 {write_count}/5 天的日报到周报文件")
+            logger.info("成功写入 %d/5 天的日报到周报文件", write_count)
 
         except PermissionError:
             raise WeeklyReportWriterError(f"无法写入周报文件，文件可能被占用: {self.weekly_report_path}")
@@ -389,9 +532,4 @@ class WeeklyReportWriter:
             week_start_date = get_week_start(week_start_date)
 
         weekly_contents = self._read_weekly_reports(week_start_date)
-        weekday_names = ["周一", "周二", "周三", "周四", "周五"]
-
-        return {
-            weekday_names[i]: content
-            for i, content in enumerate(weekly_contents)
-        }
+        return dict(zip(WEEKDAY_NAMES, weekly_contents))
@@ -0,0 +1,105 @@
+import json
+import os
+
+import pytest
+
+import config_manager
+from config_manager import ConfigManager
+
+
+@pytest.fixture
+def make_config(tmp_path, monkeypatch):
+    """在临时目录中写入配置文件并创建 ConfigManager（跳过日志初始化）"""
+    monkeypatch.setattr(ConfigManager, "_setup_logging", lambda self: None)
+    config_path = tmp_path / "config.json"
+
+    def _make(data):
+        config_path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+        return ConfigManager(str(config_path))
+
+    return _make
+
+
+BASE_CONFIG = {
+    "excel_columns": {"date": 6, "content": 7, "hours": 8},
+    "retry_config": {"max_retries": 3},
+    "gitlab": {"default_branch": "dev", "projects": [{"id": "173"}]},
+}
+
+
+def test_get_supports_dotted_keys(make_config):
+    """点号分隔的键应能取到嵌套值和中间层级的字典"""
+    manager = make_config(BASE_CONFIG)
+    assert manager.get("retry_config.max_retries") == 3
+    assert manager.get("gitlab") == BASE_CONFIG["gitlab"]
+    assert manager.get("gitlab.missing", "fallback") == "fallback"
+    assert manager.get("", "fallback") == "fallback"
+
+
+def test_reload_reflects_file_changes(make_config, tmp_path):
+    """文件内容变化后重新加载应读取到新值"""
+    manager = make_config(BASE_CONFIG)
+    updated = dict(BASE_CONFIG, retry_config={"max_retries": 5, "timeout": 30})
+    (tmp_path / "config.json").write_text(json.dumps(updated), encoding="utf-8")
+
+    manager.reload_config()
+
+    assert manager.get("retry_config.max_retries") == 5
+    assert manager.get("retry_config.timeout") == 30
+
+
+def test_config_is_not_shared_between_instances(make_config):
+    """每个实例各自解析配置文件，修改一个实例的配置不影响另一个实例"""
+    first = make_config(BASE_CONFIG)
+    second = ConfigManager(str(first.config_path))
+    first.config["gitlab"]["default_branch"] = "changed"
+    assert second.config["gitlab"]["default_branch"] == "dev"
+
+
+def test_invalid_projects_config_raises(make_config):
+    """项目配置缺少 id 时应抛出配置异常"""
+    broken = dict(BASE_CONFIG, gitlab={"projects": [{"branch": "dev"}]})
+    with pytest.raises(config_manager.ConfigurationError):
+        make_config(broken)
+
+
+def test_unknown_module_attribute_raises():
+    """模块级懒加载只处理 config 属性"""
+    with pytest.raises(AttributeError):
+        config_manager.not_a_config
+
+
+def test_gitlab_values_strip_inline_comments(make_config, monkeypatch):
+    """只有令牌和项目ID 的行内注释在加载时被去除，分支名、环境变量和其他配置保持原样"""
+    data = dict(
+        BASE_CONFIG,
+        gitlab={
+            "token": "glpat-xyz  # 个人令牌",
+            "project_id": "42 # 默认项目",
+            "default_branch": "feature#12",
+            "projects": [{"id": "173 # 主项目"}, {"id": 174}],
+        },
+        deepseek_config={"system_prompt": "使用 # 标记标题"},
+    )
+    manager = make_config(data)
+    monkeypatch.setenv("DEEPSEEK_API_KEY", "sk-abc#def")
+
+    assert manager.get("gitlab.token") == "glpat-xyz"
+    assert manager.get("gitlab.project_id") == "42"
+    assert manager.get("gitlab.default_branch") == "feature#12"
+    assert manager.get("gitlab.projects") == [{"id": "173"}, {"id": 174}]
+    assert manager.get("deepseek_config.system_prompt") == "使用 # 标记标题"
+    assert manager.get_env_or_config("DEEPSEEK_API_KEY", "deepseek.api_key") == "sk-abc#def"
+
+
+def test_cli_overrides_take_precedence_without_touching_environ(make_config, monkeypatch):
+    """命令行覆盖值优先于环境变量，且不会写入进程环境"""
+    manager = make_config(BASE_CONFIG)
+    monkeypatch.setenv("GITLAB_BRANCH", "main")
+    monkeypatch.delenv("GITLAB_TOKEN", raising=False)
+
+    manager.set_cli_overrides({"GITLAB_BRANCH": "release", "GITLAB_TOKEN": "glpat-#1"})
+
+    assert manager.get_env_or_config("GITLAB_BRANCH", "gitlab.default_branch") == "release"
+    assert manager.get_env_or_config("GITLAB_TOKEN") == "glpat-#1"
+    assert "GITLAB_TOKEN" not in os.environ
@@ -0,0 +1,52 @@
+from datetime import datetime
+
+from date_utils import (
+    parse_date_flexible,
+    is_date_match,
+    get_week_dates,
+    get_week_range_str,
+    format_date_chinese,
+)
+
+
+def test_parse_date_flexible_supports_common_formats():
+    """斜杠、横杠以及单数字月日格式都应解析为同一天"""
+    expected = datetime(2025, 1, 5)
+    assert parse_date_flexible("2025/01/05") == expected
+    assert parse_date_flexible("2025-01-05") == expected
+    assert parse_date_flexible("2025/1/5") == expected
+
+
+def test_parse_date_flexible_returns_datetime_unchanged():
+    """datetime 对象应原样返回"""
+    value = datetime(2025, 10, 31, 9, 30)
+    assert parse_date_flexible(value) is value
+
+
+def test_parse_date_flexible_rejects_invalid_values():
+    """无法识别或不合法的日期返回 None"""
+    assert parse_date_flexible(None) is None
+    assert parse_date_flexible("2025/13/40") is None
+    assert parse_date_flexible("2025/1-5") is None
+    assert parse_date_flexible("日期") is None
+    assert parse_date_flexible(12345) is None
+
+
+def test_is_date_match_ignores_time_part():
+    """只比较年月日，忽略时间部分"""
+    assert is_date_match(datetime(2025, 10, 31, 18, 0), "2025/10/31")
+    assert not is_date_match("2025/10/30", datetime(2025, 10, 31))
+    assert not is_date_match(None, datetime(2025, 10, 31))
+
+
+def test_get_week_dates_returns_monday_to_friday():
+    """周一到周五共5天，时间部分清零"""
+    week_dates = get_week_dates(datetime(2025, 10, 27, 15, 30))
+    assert week_dates == tuple(datetime(2025, 10, day) for day in range(27, 32))
+    assert get_week_range_str(datetime(2025, 10, 27)) == "2025-10-27 至 2025-10-31"
+
+
+def test_format_date_chinese():
+    """中文日期格式包含星期"""
+    assert format_date_chinese(datetime(2025, 10, 31)) == "2025年10月31日 周五"
+    assert format_date_chinese(datetime(2025, 11, 2)) == "2025年11月2日 周日"
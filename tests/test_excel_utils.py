@@ -0,0 +1,61 @@
+import os
+
+import pytest
+from openpyxl import Workbook, load_workbook
+
+from excel_utils import save_workbook_atomically
+
+
+def test_save_workbook_atomically_replaces_file_and_keeps_mode(tmp_path):
+    """保存后原路径为新内容，权限沿用原文件，目录中不残留临时文件"""
+    file_path = tmp_path / "月报.xlsx"
+    Workbook().save(file_path)
+    os.chmod(file_path, 0o644)
+
+    workbook = Workbook()
+    workbook.active["A1"] = "新内容"
+    save_workbook_atomically(workbook, file_path)
+
+    assert load_workbook(file_path).active["A1"].value == "新内容"
+    assert os.stat(file_path).st_mode & 0o777 == 0o644
+    assert [path.name for path in tmp_path.iterdir()] == ["月报.xlsx"]
+
+
+def test_save_workbook_atomically_keeps_original_on_failure(tmp_path, monkeypatch):
+    """保存出错时原文件保持不变，临时文件被清理"""
+    file_path = tmp_path / "月报.xlsx"
+    original = Workbook()
+    original.active["A1"] = "原内容"
+    original.save(file_path)
+
+    def _fail(self, filename):
+        with open(filename, "wb") as f:
+            f.write(b"partial")
+        raise OSError("磁盘已满")
+
+    workbook = Workbook()
+    monkeypatch.setattr(Workbook, "save", _fail)
+    with pytest.raises(OSError):
+        save_workbook_atomically(workbook, file_path)
+
+    monkeypatch.undo()
+    assert load_workbook(file_path).active["A1"].value == "原内容"
+    assert [path.name for path in tmp_path.iterdir()] == ["月报.xlsx"]
+
+
+def test_save_workbook_atomically_keeps_symlink(tmp_path):
+    """目标是符号链接时写入链接指向的文件，链接本身保留"""
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+    target = data_dir / "月报.xlsx"
+    Workbook().save(target)
+    link = tmp_path / "月报.xlsx"
+    link.symlink_to(target)
+
+    workbook = Workbook()
+    workbook.active["A1"] = "新内容"
+    save_workbook_atomically(workbook, link)
+
+    assert link.is_symlink()
+    assert load_workbook(target).active["A1"].value == "新内容"
+    assert [path.name for path in data_dir.iterdir()] == ["月报.xlsx"]
@@ -0,0 +1,52 @@
+from types import SimpleNamespace
+
+import pytest
+
+from gitlab_client import GitLabClient, GitLabClientError
+
+
+def _make_client(body):
+    """构造返回固定响应体的客户端，不读取配置也不连接真实服务"""
+    response = SimpleNamespace(content=body, raise_for_status=lambda: None)
+    client = GitLabClient.__new__(GitLabClient)
+    client._commits_url = "https://gitlab.example.com/api/v4/projects/1/repository/commits"
+    client._headers = {}
+    client.session = SimpleNamespace(get=lambda *args, **kwargs: response)
+    return client
+
+
+def test_non_json_response_is_reported_as_client_error():
+    """代理页、登录页等非 JSON 响应转换为 GitLabClientError，分页获取时记录并跳过"""
+    client = _make_client(b"<html>login</html>")
+
+    with pytest.raises(GitLabClientError, match="不是合法 JSON"):
+        client._make_api_request({"page": 1})
+    assert client._fetch_single_page({}, 1) is None
+
+
+def test_json_response_is_decoded():
+    """合法的 JSON 响应正常解析"""
+    client = _make_client(b'[{"title": "feat: a"}]')
+
+    assert client._make_api_request({"page": 1}) == [{"title": "feat: a"}]
+
+
+def test_pagination_only_prefetches_a_small_window(monkeypatch):
+    """第 1 页已满时只预取后面少量页面，遇到不满一页即停止"""
+    from gitlab_client import DEFAULT_PER_PAGE, PREFETCH_PAGES
+
+    requested = []
+
+    def fake_fetch(params, page):
+        requested.append(page)
+        return [{"title": f"p{page}"}] * (DEFAULT_PER_PAGE if page == 1 else 1)
+
+    client = GitLabClient.__new__(GitLabClient)
+    monkeypatch.setattr(client, "_fetch_single_page", fake_fetch)
+    monkeypatch.setattr(client, "_get_base_params", lambda since, until, branch: {})
+    monkeypatch.setattr(client, "_extract_commit_titles", lambda data: [item["title"] for item in data])
+
+    commits = client._fetch_commits_with_pagination("since", "until", "main")
+
+    assert commits == ["p1"] * DEFAULT_PER_PAGE + ["p2"]
+    assert sorted(requested) == list(range(1, PREFETCH_PAGES + 2))
@@ -0,0 +1,346 @@
+from datetime import datetime
+
+import pytest
+from openpyxl import Workbook
+
+from report_writer import ReportWriterError, find_excel_file, validate_date
+
+
+def _touch_xlsx(path):
+    """生成一个最小的 xlsx 文件"""
+    workbook = Workbook()
+    workbook.save(path)
+    workbook.close()
+
+
+def test_find_excel_file_prefers_monthly_report(tmp_path):
+    """存在多个 Excel 文件时优先返回文件名包含“月报”的文件"""
+    _touch_xlsx(tmp_path / "其他.xlsx")
+    _touch_xlsx(tmp_path / "10月月报.xlsx")
+    (tmp_path / "说明.txt").write_text("", encoding="utf-8")
+
+    assert find_excel_file(str(tmp_path)) == str(tmp_path / "10月月报.xlsx")
+
+
+def test_find_excel_file_falls_back_to_any_excel(tmp_path):
+    """没有月报文件时返回找到的 Excel 文件（多个时按文件名排序取第一个）"""
+    _touch_xlsx(tmp_path / "b.xlsx")
+    _touch_xlsx(tmp_path / "a.xlsx")
+
+    assert find_excel_file(str(tmp_path)) == str(tmp_path / "a.xlsx")
+
+
+def test_find_excel_file_creates_text_file_when_no_excel(tmp_path):
+    """数据目录不存在且没有 Excel 文件时，创建目录和日报文本文件"""
+    data_dir = tmp_path / "data"
+
+    result = find_excel_file(str(data_dir))
+
+    assert result == str(data_dir / "日报.txt")
+    assert (data_dir / "日报.txt").read_text(encoding="utf-8").startswith("# 日报记录\n")
+
+
+def test_build_parser_is_reused():
+    """解析器只构建一次，多次解析互不影响"""
+    from report_writer import _build_parser
+
+    parser = _build_parser()
+    assert _build_parser() is parser
+    assert parser.parse_args(["-d", "2025-01-15", "-vv"]).verbose == 2
+    assert parser.parse_args([]).date is None
+
+
+def test_find_excel_file_skips_directories(tmp_path):
+    """以 .xlsx 结尾的子目录不应被当作Excel文件"""
+    (tmp_path / "旧月报.xlsx").mkdir()
+    _touch_xlsx(tmp_path / "其他.xlsx")
+
+    assert find_excel_file(str(tmp_path)) == str(tmp_path / "其他.xlsx")
+
+
+def test_validate_date_accepts_iso_and_short_forms():
+    """标准日期与省略前导零的日期都能解析，其他格式报错"""
+    assert validate_date("2025-01-15") == datetime(2025, 1, 15)
+    assert validate_date("2025-1-5") == datetime(2025, 1, 5)
+    for bad in ("2025-W03-1", "2025/01/15", "2025-01-15T08:00", "2025-13-01"):
+        with pytest.raises(ReportWriterError):
+            validate_date(bad)
+
+
+def test_print_help_lists_every_long_option(capsys):
+    """手写的帮助文本需要列出解析器中所有没有短选项的长选项"""
+    from report_writer import _build_parser, print_help
+
+    print_help()
+    help_text = capsys.readouterr().out
+
+    long_options = [
+        action.option_strings[0]
+        for action in _build_parser()._actions
+        if len(action.option_strings) == 1
+    ]
+    missing = [option for option in long_options if option not in help_text]
+    assert not missing
+
+
+def test_mode_flags_are_mutually_exclusive(capsys):
+    """模式参数写入同一个 mode 字段，同时指定多个模式时解析失败"""
+    from report_writer import _build_parser
+
+    parser = _build_parser()
+    assert parser.parse_args(["--daemon"]).mode == "daemon"
+    assert parser.parse_args(["--generate-weekly"]).mode == "generate_weekly"
+    assert parser.parse_args([]).mode is None
+    with pytest.raises(SystemExit):
+        parser.parse_args(["--daemon", "--status"])
+
+
+def test_handle_main_exception_maps_types_to_exit_codes(capsys):
+    """已登记的异常（含子类）使用对应提示，其他异常统一按执行失败处理"""
+    from config_manager import ConfigurationError
+    from report_writer import handle_main_exception
+
+    class CustomWriterError(ReportWriterError):
+        pass
+
+    assert handle_main_exception(CustomWriterError("参数错误")) == 1
+    assert handle_main_exception(ConfigurationError("缺少配置")) == 1
+    assert handle_main_exception(KeyboardInterrupt()) == 0
+    assert handle_main_exception(RuntimeError("意外")) == 1
+    assert capsys.readouterr().out.splitlines() == [
+        "❌ 参数错误",
+        "❌ 配置错误: 缺少配置",
+        "",
+        "👋 用户中断，程序退出",
+        "❌ 程序执行失败: 意外",
+    ]
+
+
+def test_excel_scan_cache_follows_directory_changes(tmp_path):
+    """目录扫描结果被各查找函数共享，目录内容变化（修改时间改变）后重新扫描"""
+    import os
+
+    from report_writer import _scan_excel_files, find_monthly_report_file
+
+    _touch_xlsx(tmp_path / "其他.xlsx")
+    assert find_excel_file(str(tmp_path)) == str(tmp_path / "其他.xlsx")
+    assert find_monthly_report_file(str(tmp_path)) is None
+    assert _scan_excel_files.cache_info().currsize >= 1
+
+    _touch_xlsx(tmp_path / "月报.xlsx")
+    # 部分文件系统的时间精度较粗，显式推进目录修改时间
+    stat = os.stat(tmp_path)
+    os.utime(tmp_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    assert find_excel_file(str(tmp_path)) == str(tmp_path / "月报.xlsx")
+    assert find_monthly_report_file(str(tmp_path)) == str(tmp_path / "月报.xlsx")
+
+
+def test_excel_scan_skips_lock_and_temp_files(tmp_path):
+    """Excel 的 ~$ 锁文件和原子保存遗留的 .~ 临时文件排序靠前，但不应被当作工作簿"""
+    from report_writer import _list_excel_files, find_monthly_report_file
+
+    (tmp_path / "~$10月月报.xlsx").write_bytes(b"lock")
+    (tmp_path / ".~tmp123.xlsx").write_bytes(b"")
+    _touch_xlsx(tmp_path / "10月月报.xlsx")
+
+    assert _list_excel_files(str(tmp_path)) == (str(tmp_path / "10月月报.xlsx"),)
+    assert find_monthly_report_file(str(tmp_path)) == str(tmp_path / "10月月报.xlsx")
+
+def test_normalize_cli_value_strips_invisible_chars_and_quotes():
+    """BOM、零宽字符、首尾空白和引号都会被去除，中间内容保持不变"""
+    from report_writer import normalize_cli_value
+
+    assert normalize_cli_value("\ufeff'data/月 报.xlsx'\r\n") == "data/月 报.xlsx"
+    assert normalize_cli_value("2025-01-15\u200b") == "2025-01-15"
+    assert validate_date(' "2025-01-15" ') == datetime(2025, 1, 15)
+
+
+def test_write_to_text_file_appends_once_per_day(tmp_path):
+    """同一天只写入一次；摘要正文中提到的日期不视为已有记录"""
+    from report_writer import write_to_text_file
+
+    txt_path = tmp_path / "日报.txt"
+    txt_path.write_text("# 日报记录\n2025-01-14 - 修复 2025-01-15 发布的问题\n", encoding="utf-8")
+
+    assert write_to_text_file(str(txt_path), datetime(2025, 1, 15), "新增导出")
+    assert write_to_text_file(str(txt_path), datetime(2025, 1, 15), "重复写入")
+    assert write_to_text_file(str(tmp_path / "新建.txt"), datetime(2025, 1, 15), "首条", durable=True)
+
+    assert txt_path.read_text(encoding="utf-8").splitlines()[-1] == "2025-01-15 - 新增导出"
+    assert txt_path.read_text(encoding="utf-8").count("2025-01-15 -") == 1
+    assert (tmp_path / "新建.txt").read_text(encoding="utf-8") == "2025-01-15 - 首条\n"
+
+
+def test_find_weekly_report_file_matches_keywords(tmp_path):
+    """周报查找只返回文件名包含“周报”或“周”的Excel文件"""
+    from report_writer import find_weekly_report_file
+
+    _touch_xlsx(tmp_path / "月报.xlsx")
+    assert find_weekly_report_file(str(tmp_path)) is None
+
+    _touch_xlsx(tmp_path / "第3周.xlsx")
+    assert find_weekly_report_file(str(tmp_path)) == str(tmp_path / "第3周.xlsx")
+
+
+def test_every_mode_flag_has_a_command():
+    """解析器中的每个模式参数都在 MODE_COMMANDS 中有对应入口"""
+    from report_writer import MODE_COMMANDS, _build_parser
+
+    mode_consts = {action.const for action in _build_parser()._actions if action.dest == "mode"}
+    assert mode_consts <= set(MODE_COMMANDS)
+    assert "run_once" in MODE_COMMANDS
+
+
+def test_ensure_text_report_creates_header_only_once(tmp_path):
+    """文本日报只在不存在时创建并写入文件头，已有内容不会被覆盖"""
+    from report_writer import _ensure_text_report
+
+    txt_path = tmp_path / "日报.txt"
+    assert _ensure_text_report(txt_path)
+    txt_path.write_text(txt_path.read_text(encoding="utf-8") + "2025-01-15 - 记录\n", encoding="utf-8")
+
+    assert not _ensure_text_report(txt_path)
+    content = txt_path.read_text(encoding="utf-8")
+    assert content.startswith("# 日报记录\n") and content.count("# 日报记录") == 1
+    assert content.endswith("2025-01-15 - 记录\n")
+
+
+def test_has_text_record_falls_back_when_mmap_fails(tmp_path, monkeypatch):
+    """mmap 不可用时逐行扫描，结果与映射方式一致"""
+    import report_writer
+
+    def _no_mmap(*args, **kwargs):
+        raise OSError("mmap unsupported")
+
+    monkeypatch.setattr(report_writer.mmap, "mmap", _no_mmap)
+    txt_path = tmp_path / "日报.txt"
+    txt_path.write_text("# 日报记录\n2025-01-14 - 提到 2025-01-15\n", encoding="utf-8")
+
+    assert report_writer.write_to_text_file(str(txt_path), datetime(2025, 1, 15), "新增导出")
+    assert report_writer.write_to_text_file(str(txt_path), datetime(2025, 1, 15), "重复写入")
+    assert txt_path.read_text(encoding="utf-8").count("2025-01-15 -") == 1
+
+
+def test_report_finders_return_none_for_missing_directory(tmp_path):
+    """数据目录不存在时月报/周报查找直接返回 None，且不会创建目录"""
+    from report_writer import find_monthly_report_file, find_weekly_report_file
+
+    missing = tmp_path / "missing"
+    assert find_monthly_report_file(str(missing)) is None
+    assert find_weekly_report_file(str(missing)) is None
+    assert not missing.exists()
+
+
+def test_resolve_project_id_for_range():
+    """命令行参数优先；配置中只有一个（可重复）项目ID时自动选择，多个不同ID时报错"""
+    from types import SimpleNamespace
+
+    from report_writer import resolve_project_id_for_range
+
+    def _updater(projects, client_project_id=None):
+        client = SimpleNamespace(project_id=client_project_id) if client_project_id else None
+        return SimpleNamespace(projects=projects, gitlab_client=client)
+
+    assert resolve_project_id_for_range(_updater([{"id": 1}]), "9", "8") == "9"
+    assert resolve_project_id_for_range(_updater([{"id": 1}, {"id": "1"}]), None, None) == "1"
+    assert resolve_project_id_for_range(_updater([], 42), None, None) == "42"
+    with pytest.raises(ReportWriterError):
+        resolve_project_id_for_range(_updater([{"id": 1}, {"id": 2}]), None, None)
+    with pytest.raises(ReportWriterError):
+        resolve_project_id_for_range(_updater(None), None, None)
+
+
+def test_main_prints_version_without_building_parser(capsys, monkeypatch):
+    """单独的 -V / -h 参数直接输出，不构建命令行解析器"""
+    import report_writer
+
+    def _fail():
+        raise AssertionError("parser should not be built")
+
+    monkeypatch.setattr(report_writer, "_build_parser", _fail)
+    monkeypatch.setattr(report_writer.sys, "argv", ["report-writer", "-V"])
+    assert report_writer.main() == 0
+    monkeypatch.setattr(report_writer.sys, "argv", ["report-writer", "--help"])
+    assert report_writer.main() == 0
+
+    assert capsys.readouterr().out == report_writer.VERSION_TEXT + report_writer.HELP_TEXT
+
+
+def test_range_summary_command_lists_commits(capsys, monkeypatch):
+    """区间摘要按序号列出全部提交并输出摘要"""
+    import argparse
+
+    import report_writer
+
+    class _Updater:
+        projects = [{"id": "173"}]
+        gitlab_client = None
+
+        def summarize_project_range(self, project_id, start_date, end_date, branch):
+            return {"projectId": project_id, "branch": "dev", "commitCount": 2,
+                    "commits": ["修复导出", "新增周报"], "summary": "完成导出与周报"}
+
+    monkeypatch.setattr(report_writer, "get_updater", _Updater)
+    args = argparse.Namespace(start_date="2025-01-01", end_date="2025-01-07",
+                              range_project=None, gitlab_project=None, range_branch=None)
+
+    assert report_writer.range_summary_command(args) == 0
+    out = capsys.readouterr().out
+    assert "📅 日期范围: 2025-01-01 至 2025-01-07\n" in out
+    assert "🔖 提交列表:\n  1. 修复导出\n  2. 新增周报\n\n📝 提交摘要:\n完成导出与周报\n" in out
+
+
+def test_has_text_record_checks_tail_then_whole_file(tmp_path):
+    """文件较大时先查末尾，早于末尾区域的记录也能找到，半行内容不会被当作行首"""
+    from report_writer import TEXT_RECORD_TAIL_BYTES, _has_text_record
+
+    txt_path = tmp_path / "日报.txt"
+    filler = "".join(f"2024-12-{day:02d} - 内容\n" for day in range(1, 29)) * (TEXT_RECORD_TAIL_BYTES // 200)
+    txt_path.write_bytes(("2025-01-01 - 首条\n" + filler + "2025-01-15 - 末条\n").encode("utf-8"))
+
+    with open(txt_path, "rb") as f:
+        assert _has_text_record(f, "2025-01-15")
+        assert _has_text_record(f, "2025-01-01")
+        assert not _has_text_record(f, "2025-02-01")
+
+
+def test_is_text_file_ignores_extension_case():
+    """扩展名大小写不影响文本文件判断"""
+    from report_writer import is_text_file
+
+    assert is_text_file("data/日报.TXT")
+    assert is_text_file("日报.txt")
+    assert not is_text_file("月报.xlsx")
+    assert not is_text_file("txt")
+
+
+def test_data_file_command_only_reports_missing_files(tmp_path, capsys, monkeypatch):
+    """指定的 Excel 不存在时提示并返回 1；无权限等其他 stat 错误交给 main 的通用异常处理"""
+    import argparse
+
+    import report_writer
+
+    args = argparse.Namespace(file=str(tmp_path / "月报.xlsx"), excel_file=None, mode=None)
+    assert report_writer.data_file_command(args) == 1
+    assert "❌ 文件不存在" in capsys.readouterr().out
+
+    def _denied(path):
+        raise PermissionError(13, "Permission denied", path)
+
+    monkeypatch.setattr(report_writer.os, "stat", _denied)
+    with pytest.raises(PermissionError):
+        report_writer.data_file_command(args)
+
+
+def test_text_report_uses_lf_line_endings_only(tmp_path):
+    """文件头和追加的记录都只使用 LF 换行，摘要中的 CRLF 同样转换"""
+    from report_writer import _ensure_text_report, write_to_text_file
+
+    txt_path = tmp_path / "日报.txt"
+    assert _ensure_text_report(txt_path)
+    assert write_to_text_file(str(txt_path), datetime(2025, 1, 15), "1. 新增导出\r\n2. 修复周报")
+
+    content = txt_path.read_bytes()
+    assert b"\r" not in content
+    assert content.endswith("2025-01-15 - 1. 新增导出\n2. 修复周报\n".encode("utf-8"))
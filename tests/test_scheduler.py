@@ -0,0 +1,58 @@
+from types import SimpleNamespace
+
+import pytest
+from openpyxl import Workbook
+
+import scheduler
+from scheduler import ReportScheduler
+
+
+def test_next_run_time_is_available_before_start(tmp_path, monkeypatch):
+    """调度器启动前也能从触发器推算出下次执行时间"""
+    excel_path = tmp_path / "月报.xlsx"
+    workbook = Workbook()
+    workbook.save(excel_path)
+    workbook.close()
+
+    # 只验证调度逻辑：使用内置默认配置，不初始化真实的更新器
+    monkeypatch.setattr(scheduler, "get_config", lambda: SimpleNamespace(get=lambda key, default=None: default))
+    monkeypatch.setattr(scheduler, "ReportUpdater", lambda: None)
+    monkeypatch.setattr(ReportScheduler, "_setup_signal_handlers", lambda self: None)
+
+    report_scheduler = ReportScheduler(str(excel_path))
+    next_run = report_scheduler.get_next_run_time()
+
+    assert next_run is not None
+    assert (next_run.hour, next_run.minute) == (scheduler.DEFAULT_SCHEDULE_HOUR, scheduler.DEFAULT_SCHEDULE_MINUTE)
+    assert report_scheduler.get_job_status()["next_run_time"] == next_run
+
+
+def test_validate_excel_path_checks_existence_and_suffix(tmp_path):
+    """不存在的文件和非 .xlsx 文件都被拒绝，扩展名不区分大小写"""
+    from scheduler import SchedulerError
+
+    validate = ReportScheduler._validate_excel_path
+    (tmp_path / "月报.XLSX").write_bytes(b"")
+    (tmp_path / "日报.txt").write_text("", encoding="utf-8")
+
+    assert validate(None, str(tmp_path / "月报.XLSX")) == str(tmp_path / "月报.XLSX")
+    with pytest.raises(SchedulerError, match="不存在"):
+        validate(None, str(tmp_path / "缺失.xlsx"))
+    with pytest.raises(SchedulerError, match="格式不正确"):
+        validate(None, str(tmp_path / "日报.txt"))
+
+
+def test_schedule_config_accepts_string_values(tmp_path, monkeypatch):
+    """配置中写成字符串的小时、分钟在初始化时转为整数"""
+    excel_path = tmp_path / "月报.xlsx"
+    excel_path.write_bytes(b"")
+    values = {"schedule.hour": "9", "schedule.minute": "05"}
+
+    monkeypatch.setattr(scheduler, "get_config", lambda: SimpleNamespace(get=lambda key, default=None: values.get(key, default)))
+    monkeypatch.setattr(scheduler, "ReportUpdater", lambda: None)
+    monkeypatch.setattr(ReportScheduler, "_setup_signal_handlers", lambda self: None)
+
+    report_scheduler = ReportScheduler(str(excel_path))
+
+    assert report_scheduler.schedule_config == {"hour": 9, "minute": 5, "timezone": scheduler.DEFAULT_TIMEZONE}
+    assert (report_scheduler.get_next_run_time().hour, report_scheduler.get_next_run_time().minute) == (9, 5)
@@ -0,0 +1,222 @@
+from types import SimpleNamespace
+
+import pytest
+
+import updater
+from updater import ReportUpdater
+
+
+class _FakeClient:
+    def __init__(self, ok):
+        self.ok = ok
+
+    def validate_connection(self):
+        return self.ok
+
+
+def _make_updater(monkeypatch, clients):
+    """构造只包含健康检查所需属性的更新器，不连接真实服务"""
+    monkeypatch.setattr(updater, "get_config", lambda: SimpleNamespace(get=lambda key, default=None: {"configured": True}))
+    instance = ReportUpdater.__new__(ReportUpdater)
+    instance.deepseek_api_key = "key"
+    instance.date_column, instance.content_column, instance.hours_column = 6, 7, 8
+    monkeypatch.setattr(instance, "_get_gitlab_clients", lambda: clients)
+    return instance
+
+
+def test_health_check_requires_every_project_connection(monkeypatch):
+    """多项目模式下任一项目连接失败，GitLab 连接检查即为失败"""
+    assert _make_updater(monkeypatch, [_FakeClient(True), _FakeClient(True)]).health_check() == {
+        "gitlab_connection": True,
+        "deepseek_api_key": True,
+        "config_loaded": True,
+    }
+    assert not _make_updater(monkeypatch, [_FakeClient(True), _FakeClient(False)]).health_check()["gitlab_connection"]
+    assert not _make_updater(monkeypatch, []).health_check()["gitlab_connection"]
+
+
+def test_fetch_all_commits_keeps_project_order(monkeypatch):
+    """并发获取多个项目的提交，结果按配置顺序合并并跳过无提交的项目"""
+    instance = ReportUpdater.__new__(ReportUpdater)
+    instance.projects = [{"id": "1"}, {"id": "2"}, {"id": "3"}]
+    clients = [SimpleNamespace(project_id=pid, default_branch="dev") for pid in ("1", "2", "3")]
+    commits = {"1": ["feat: a"], "2": [], "3": ["fix: c"]}
+    monkeypatch.setattr(instance, "_get_gitlab_clients", lambda: clients)
+    monkeypatch.setattr(instance, "_fetch_commits_safely", lambda client, date_obj: commits[client.project_id])
+
+    result = instance._fetch_all_commits(None)
+
+    assert list(result.items()) == [("1", ["feat: a"]), ("3", ["fix: c"])]
+
+
+def test_format_target_date_drops_leading_zeros():
+    """Excel 中的日期格式为不带前导零的 年/月/日"""
+    from datetime import datetime
+
+    instance = ReportUpdater.__new__(ReportUpdater)
+    assert instance._format_target_date(datetime(2025, 1, 5)) == "2025/1/5"
+    assert instance._format_target_date(datetime(2025, 11, 25)) == "2025/11/25"
+
+
+def test_write_to_excel_updates_matching_date_row(tmp_path):
+    """按日期列找到对应行，写入内容并在工时为空时填入默认工时"""
+    from datetime import datetime
+
+    from openpyxl import Workbook, load_workbook
+
+    xlsx_path = tmp_path / "月报.xlsx"
+    workbook = Workbook()
+    worksheet = workbook.active
+    worksheet.cell(3, 6, "2025/1/4")
+    worksheet.cell(4, 6, "2025/1/5")
+    worksheet.cell(5, 6, "2025/1/6")
+    worksheet.cell(5, 8, 4)
+    workbook.save(xlsx_path)
+
+    instance = ReportUpdater.__new__(ReportUpdater)
+    instance.date_column, instance.content_column, instance.hours_column = 6, 7, 8
+
+    assert instance._write_to_excel(str(xlsx_path), datetime(2025, 1, 5), "完成导出", 8)
+    assert instance._write_to_excel(str(xlsx_path), datetime(2025, 1, 6), "修复周报", 8)
+    assert not instance._write_to_excel(str(xlsx_path), datetime(2025, 2, 1), "无对应行", 8)
+
+    worksheet = load_workbook(xlsx_path).active
+    assert [worksheet.cell(row, 7).value for row in (3, 4, 5)] == [None, "完成导出", "修复周报"]
+    assert [worksheet.cell(row, 8).value for row in (3, 4, 5)] == [None, 8, 4]
+    assert worksheet.cell(4, 7).alignment.wrap_text
+
+
+def test_write_to_excel_matches_date_typed_cells(tmp_path):
+    """日期列为 Excel 日期类型时同样能找到对应行"""
+    from datetime import datetime
+
+    from openpyxl import Workbook, load_workbook
+
+    xlsx_path = tmp_path / "月报.xlsx"
+    workbook = Workbook()
+    workbook.active.cell(3, 6, datetime(2025, 1, 5))
+    workbook.save(xlsx_path)
+
+    instance = ReportUpdater.__new__(ReportUpdater)
+    instance.date_column, instance.content_column, instance.hours_column = 6, 7, 8
+
+    assert instance._write_to_excel(str(xlsx_path), datetime(2025, 1, 5, 18, 30), "完成导出", 8)
+    assert load_workbook(xlsx_path).active.cell(3, 7).value == "完成导出"
+
+
+def test_create_prompt_lists_commits_after_header():
+    """提示词由固定说明和逐行列出的提交组成"""
+    instance = ReportUpdater.__new__(ReportUpdater)
+
+    assert instance._create_prompt(["修复导出", "新增周报"]) == updater.SUMMARY_PROMPT_HEADER + "- 修复导出\n- 新增周报"
+    assert instance._create_prompt([]) == updater.SUMMARY_PROMPT_HEADER
+
+
+def test_call_deepseek_api_reuses_summary_for_same_commits():
+    """同一提交列表只请求一次 API"""
+    calls = []
+
+    def _create(**kwargs):
+        calls.append(kwargs["messages"][1]["content"])
+        message = SimpleNamespace(content=f" 摘要{len(calls)} ")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+    instance = ReportUpdater.__new__(ReportUpdater)
+    instance.deepseek_model, instance.deepseek_temperature, instance.deepseek_max_tokens = "deepseek-chat", 0.4, 300
+    instance._system_message = {"role": "system", "content": "系统"}
+    instance._summary_cache = {}
+    instance.openai_client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=_create)))
+
+    assert instance._call_deepseek_api(["修复导出"]) == "摘要1"
+    assert instance._call_deepseek_api(["修复导出"]) == "摘要1"
+    assert instance._call_deepseek_api(["新增周报"]) == "摘要2"
+    assert len(calls) == 2
+
+
+def test_validate_excel_file_reports_missing_and_wrong_type(tmp_path):
+    """缺失的文件和非 .xlsx 文件分别给出对应错误"""
+    from updater import ReportUpdaterError
+
+    instance = ReportUpdater.__new__(ReportUpdater)
+    (tmp_path / "月报.XLSX").write_bytes(b"")
+    (tmp_path / "日报.txt").write_text("", encoding="utf-8")
+
+    instance._validate_excel_file(str(tmp_path / "月报.XLSX"))
+    with pytest.raises(ReportUpdaterError, match="不存在"):
+        instance._validate_excel_file(str(tmp_path / "缺失.xlsx"))
+    with pytest.raises(ReportUpdaterError, match="不存在"):
+        instance._validate_excel_file(str(tmp_path / "缺失.txt"))
+    with pytest.raises(ReportUpdaterError, match="格式不正确"):
+        instance._validate_excel_file(str(tmp_path / "日报.txt"))
+
+
+def test_cleanup_old_backups_keeps_newest(tmp_path):
+    """只保留修改时间最新的 max_backups 个备份，其他文件不受影响"""
+    import os
+
+    for index in range(4):
+        backup = tmp_path / f"月报_{index}.xlsx"
+        backup.write_bytes(b"")
+        os.utime(backup, (1_700_000_000 + index, 1_700_000_000 + index))
+    (tmp_path / "说明.txt").write_text("", encoding="utf-8")
+
+    instance = ReportUpdater.__new__(ReportUpdater)
+    instance.max_backups = 2
+    instance._cleanup_old_backups(tmp_path)
+
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["月报_2.xlsx", "月报_3.xlsx", "说明.txt"]
+
+
+def test_create_simple_summary_numbers_commits_and_folds_overflow():
+    """最多列出 MAX_COMMIT_DISPLAY 条提交，其余合并为一条"""
+    instance = ReportUpdater.__new__(ReportUpdater)
+    commits = [f"提交{i}" for i in range(1, updater.MAX_COMMIT_DISPLAY + 3)]
+
+    assert instance._create_simple_summary(["修复导出", "新增周报"]) == "1. 修复导出\n2. 新增周报"
+    lines = instance._create_simple_summary(commits).splitlines()
+    assert len(lines) == updater.MAX_COMMIT_DISPLAY + 1
+    assert lines[-1] == f"{updater.MAX_COMMIT_DISPLAY + 1}. 以及其他2项提交"
+    assert instance._create_simple_summary([]) == "无提交记录"
+
+
+def test_summary_fallback_merges_projects_once():
+    """多个项目的提交合并后连续编号；没有任何提交时直接返回默认摘要"""
+    instance = ReportUpdater.__new__(ReportUpdater)
+    instance.openai_client = None
+
+    summary = instance._generate_summary_with_fallback({"1": ["修复导出"], "2": ["新增周报"]})
+    assert summary == "1. 修复导出\n2. 新增周报"
+    assert instance._generate_summary_with_fallback({"1": []}) == updater.DEFAULT_SUMMARY_FALLBACK
+    assert instance._generate_summary_with_fallback({}) == updater.DEFAULT_SUMMARY_FALLBACK
+
+
+def test_create_backup_skips_unchanged_file(tmp_path):
+    """文件自上次备份后未修改时不再复制；修改后重新备份"""
+    import os
+
+    xlsx_path = tmp_path / "月报.xlsx"
+    xlsx_path.write_bytes(b"v1")
+    instance = ReportUpdater.__new__(ReportUpdater)
+    instance.backup_enabled, instance.max_backups = True, 5
+
+    assert instance._create_backup(str(xlsx_path))
+    assert instance._create_backup(str(xlsx_path))
+    assert len(list((tmp_path / "backups").iterdir())) == 1
+
+    xlsx_path.write_bytes(b"v2!")
+    os.utime(xlsx_path, ns=(1_900_000_000_000_000_000, 1_900_000_000_000_000_000))
+    for backup in (tmp_path / "backups").iterdir():
+        backup.rename(backup.with_name("月报_20250101_000000.xlsx"))
+    assert instance._create_backup(str(xlsx_path))
+    assert len(list((tmp_path / "backups").iterdir())) == 2
+
+
+def test_health_check_reports_failure_when_check_raises(monkeypatch):
+    """某个项目的连接检查抛出异常时，健康检查返回失败结果而不是崩溃"""
+    class _RaisingClient:
+        def validate_connection(self):
+            raise ConnectionError("Broken pipe")
+
+    status = _make_updater(monkeypatch, [_FakeClient(True), _RaisingClient()]).health_check()
+
+    assert status == {"gitlab_connection": False, "deepseek_api_key": True, "config_loaded": True}
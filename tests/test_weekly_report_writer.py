@@ -1,10 +1,19 @@
+from datetime import datetime
+from types import SimpleNamespace
+
 import pytest
 from openpyxl import Workbook, load_workbook
 
 from weekly_report_writer import (
+    copy_template_to_data_dir,
+    find_template_file,
     _extract_name_from_template,
     _update_weekly_title_text,
+    WeeklyReportWriter,
     WeeklyReportWriterError,
+    MONTHLY_DATE_COLUMN,
+    MONTHLY_CONTENT_COLUMN,
+    MONTHLY_START_ROW,
 )
 
 
@@ -63,3 +72,226 @@ def test_update_weekly_title_text_handles_compact_placeholder(tmp_path):
     sheet = loaded.active
     assert sheet["A1"].value == "第12周完成重点工作"
     loaded.close()
+
+
+def _create_monthly_report(file_path, rows):
+    """按 (日期, 内容) 列表生成月报文件，从数据起始行开始填写"""
+    workbook = Workbook()
+    worksheet = workbook.active
+    for offset, (date_value, content) in enumerate(rows):
+        row = MONTHLY_START_ROW + offset
+        worksheet.cell(row=row, column=MONTHLY_DATE_COLUMN, value=date_value)
+        worksheet.cell(row=row, column=MONTHLY_CONTENT_COLUMN, value=content)
+    workbook.save(file_path)
+    workbook.close()
+
+
+def test_read_weekly_reports_collects_weekday_contents(tmp_path):
+    """按周一到周五顺序读取月报内容，缺失或为空的日期返回 None"""
+    monthly_path = tmp_path / "10月月报.xlsx"
+    weekly_path = tmp_path / "周报.xlsx"
+    _create_monthly_report(monthly_path, [
+        ("2025/10/24", "上周五"),
+        ("2025/10/27", "  周一工作  "),
+        (datetime(2025, 10, 28), "周二工作"),
+        ("2025/10/29", None),
+        ("2025/10/31", "周五工作"),
+        ("2025/11/1", "周六加班"),
+    ])
+    Workbook().save(weekly_path)
+
+    writer = WeeklyReportWriter(str(monthly_path), str(weekly_path))
+    contents = writer._read_weekly_reports(datetime(2025, 10, 27))
+
+    assert contents == ["周一工作", "周二工作", None, None, "周五工作"]
+
+
+def test_write_to_weekly_report_skips_save_when_unchanged(tmp_path, monkeypatch):
+    """重复写入相同内容时不再保存周报文件"""
+    monthly_path = tmp_path / "10月月报.xlsx"
+    weekly_path = tmp_path / "周报.xlsx"
+    _create_monthly_report(monthly_path, [])
+    Workbook().save(weekly_path)
+
+    saves = []
+    original_save = Workbook.save
+    monkeypatch.setattr(Workbook, "save", lambda self, filename: saves.append(filename) or original_save(self, filename))
+
+    writer = WeeklyReportWriter(str(monthly_path), str(weekly_path))
+    contents = ["周一工作", None, "周三工作", None, None]
+    writer._write_to_weekly_report(contents)
+    writer._write_to_weekly_report(contents)
+    writer._write_to_weekly_report(["周一工作", "周二工作", "周三工作", None, None])
+
+    assert len(saves) == 2
+    sheet = load_workbook(weekly_path).active
+    assert [sheet.cell(row=row, column=2).value for row in range(3, 6)] == ["周一工作", "周二工作", "周三工作"]
+
+    # 全部为空时不再打开周报文件
+    import weekly_report_writer
+    monkeypatch.setattr(weekly_report_writer, "load_workbook", lambda *args, **kwargs: pytest.fail("不应打开周报"))
+    writer._write_to_weekly_report([None] * 5)
+
+
+def test_read_weekly_reports_uses_calamine_when_available(tmp_path, monkeypatch):
+    """安装 python-calamine 时按其返回的行列表读取，日期单元格为 date 类型"""
+    from datetime import date
+
+    import weekly_report_writer
+
+    monthly_path = tmp_path / "10月月报.xlsx"
+    weekly_path = tmp_path / "周报.xlsx"
+    _create_monthly_report(monthly_path, [])
+    Workbook().save(weekly_path)
+
+    blank = [""] * MONTHLY_CONTENT_COLUMN
+    rows = [blank, blank]
+    for cell_date, content in ((date(2025, 10, 27), "周一工作"), ("2025/10/28", "周二工作"), ("", "")):
+        row = list(blank)
+        row[MONTHLY_DATE_COLUMN - 1], row[MONTHLY_CONTENT_COLUMN - 1] = cell_date, content
+        rows.append(row)
+
+    class _FakeCalamineWorkbook:
+        sheet_names = ["Sheet1"]
+
+        @classmethod
+        def from_path(cls, path):
+            return cls()
+
+        def get_sheet_by_index(self, index):
+            return SimpleNamespace(to_python=lambda skip_empty_area: rows)
+
+    monkeypatch.setattr(weekly_report_writer, "CalamineWorkbook", _FakeCalamineWorkbook)
+    writer = WeeklyReportWriter(str(monthly_path), str(weekly_path))
+
+    assert writer._read_weekly_reports(datetime(2025, 10, 27)) == ["周一工作", "周二工作", None, None, None]
+
+
+def test_read_weekly_reports_ignores_wrong_sheet_dimension(tmp_path):
+    """工作表 dimension 被错误记为 A1:A1 时仍能读到全部数据行"""
+    import re
+    import zipfile
+
+    monthly_path = tmp_path / "10月月报.xlsx"
+    broken_path = tmp_path / "11月月报.xlsx"
+    weekly_path = tmp_path / "周报.xlsx"
+    _create_monthly_report(monthly_path, [("2025/10/27", "周一工作")])
+    Workbook().save(weekly_path)
+
+    with zipfile.ZipFile(monthly_path) as source, zipfile.ZipFile(broken_path, "w") as target:
+        for item in source.infolist():
+            data = source.read(item.filename)
+            if item.filename == "xl/worksheets/sheet1.xml":
+                data = re.sub(rb'<dimension ref="[^"]+"', b'<dimension ref="A1:A1"', data)
+            target.writestr(item, data)
+
+    writer = WeeklyReportWriter(str(broken_path), str(weekly_path))
+    assert writer._read_weekly_reports(datetime(2025, 10, 27))[0] == "周一工作"
+
+
+def test_read_weekly_reports_reuses_scan_until_monthly_changes(tmp_path, monkeypatch):
+    """预览后再生成同一周时不再重复解析月报；月报修改后重新读取"""
+    import os
+
+    monthly_path = tmp_path / "10月月报.xlsx"
+    weekly_path = tmp_path / "周报.xlsx"
+    _create_monthly_report(monthly_path, [("2025/10/27", "周一工作")])
+    Workbook().save(weekly_path)
+
+    writer = WeeklyReportWriter(str(monthly_path), str(weekly_path))
+    scans = []
+    original_iter = writer._iter_monthly_rows
+    monkeypatch.setattr(writer, "_iter_monthly_rows", lambda: scans.append(1) or original_iter())
+
+    assert writer.preview_weekly_report(datetime(2025, 10, 27))["周一"] == "周一工作"
+    assert writer._read_weekly_reports(datetime(2025, 10, 27))[0] == "周一工作"
+    assert len(scans) == 1
+
+    _create_monthly_report(monthly_path, [("2025/10/27", "周一修改")])
+    os.utime(monthly_path, ns=(1_900_000_000_000_000_000, 1_900_000_000_000_000_000))
+    assert writer._read_weekly_reports(datetime(2025, 10, 27))[0] == "周一修改"
+    assert len(scans) == 2
+
+
+def test_find_template_file_prefers_weekly_template(tmp_path):
+    """优先返回文件名包含"周报"的模板，否则返回任一 .xlsx 文件；目录不存在时返回 None"""
+    (tmp_path / "说明.txt").write_text("", encoding="utf-8")
+    (tmp_path / "其他.xlsx").write_bytes(b"")
+    assert find_template_file(str(tmp_path)) == str(tmp_path / "其他.xlsx")
+
+    (tmp_path / "张三-第n周周报表.xlsx").write_bytes(b"")
+    assert find_template_file(str(tmp_path)) == str(tmp_path / "张三-第n周周报表.xlsx")
+
+    assert find_template_file(str(tmp_path / "缺失")) is None
+
+
+def test_generate_from_template_writes_title_and_contents_in_one_save(tmp_path, monkeypatch):
+    """从模板生成周报时，周次标题和日报内容在同一次保存中写入"""
+    template_dir = tmp_path / "template"
+    template_dir.mkdir()
+    template = Workbook()
+    template.active["A1"] = "第n周完成重点工作"
+    template.save(template_dir / "张三-第n周周报表.xlsx")
+
+    monthly_path = tmp_path / "10月月报.xlsx"
+    _create_monthly_report(monthly_path, [("2025/10/27", "周一工作")])
+
+    saves = []
+    original_save = Workbook.save
+    monkeypatch.setattr(Workbook, "save", lambda self, filename: saves.append(filename) or original_save(self, filename))
+
+    monday = datetime(2025, 10, 27)
+    writer = WeeklyReportWriter(str(monthly_path), str(tmp_path), use_template=True, template_dir=str(template_dir), week_start_date=monday)
+    assert writer.generate_weekly_report(monday)
+
+    assert len(saves) == 1
+    sheet = load_workbook(writer.weekly_report_path).active
+    assert sheet["A1"].value == "第43周完成重点工作"
+    assert sheet.cell(row=3, column=2).value == "周一工作"
+
+
+def test_copy_template_reports_missing_template(tmp_path):
+    """模板文件不存在时抛出周报生成器异常"""
+    with pytest.raises(WeeklyReportWriterError, match="模板文件不存在"):
+        copy_template_to_data_dir(str(tmp_path / "张三-第n周周报表.xlsx"), data_dir=str(tmp_path / "data"))
+
+
+def test_template_title_is_replaced_when_reading_monthly_fails(tmp_path, monkeypatch):
+    """读取月报出错时，从模板复制的周报仍会替换周次标题"""
+    template_dir = tmp_path / "template"
+    template_dir.mkdir()
+    template = Workbook()
+    template.active["A1"] = "第n周完成重点工作"
+    template.save(template_dir / "张三-第n周周报表.xlsx")
+
+    monthly_path = tmp_path / "10月月报.xlsx"
+    _create_monthly_report(monthly_path, [])
+
+    monday = datetime(2025, 10, 27)
+    writer = WeeklyReportWriter(str(monthly_path), str(tmp_path), use_template=True, template_dir=str(template_dir), week_start_date=monday)
+
+    def _raise(monday):
+        raise WeeklyReportWriterError("月报文件被占用")
+
+    monkeypatch.setattr(writer, "_read_weekly_reports", _raise)
+    assert not writer.generate_weekly_report(monday)
+
+    assert load_workbook(writer.weekly_report_path).active["A1"].value == "第43周完成重点工作"
+
+
+def test_template_title_is_replaced_when_week_has_no_reports(tmp_path):
+    """本周没有日报内容时生成失败，但从模板复制的周报标题仍替换为具体周次"""
+    template_dir = tmp_path / "template"
+    template_dir.mkdir()
+    template = Workbook()
+    template.active["A1"] = "第n周完成重点工作"
+    template.save(template_dir / "张三-第n周周报表.xlsx")
+
+    monthly_path = tmp_path / "10月月报.xlsx"
+    _create_monthly_report(monthly_path, [("2025/10/20", "上周工作")])
+
+    monday = datetime(2025, 10, 27)
+    writer = WeeklyReportWriter(str(monthly_path), str(tmp_path), use_template=True, template_dir=str(template_dir), week_start_date=monday)
+    assert not writer.generate_weekly_report(monday)
+
+    assert load_workbook(writer.weekly_report_path).active["A1"].value == "第43周完成重点工作"